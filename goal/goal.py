@@ -98,6 +98,13 @@ class Goal(ABC):
         """
         pass
 
+    def update_visual_aux(self):
+        """
+        Called instead of build_visual_aux when the env keeps the simulation for the next episode, such that the objects
+        built there still exist. Should move them to the new targets, by default nothing happens.
+        """
+        pass
+
     def get_data_for_logging(self) -> dict:
         """
         This method can be used to return goal-related data for logging.
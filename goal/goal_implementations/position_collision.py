@@ -3,6 +3,7 @@ import numpy as np
 from robot.robot import Robot
 from gym.spaces import Box
 import pybullet as pyb
+from world.obstacles.shape_cache import ShapeCache
 
 __all__ = [
     'PositionCollisionGoal'
@@ -179,9 +180,19 @@ class PositionCollisionGoal(Goal):
     def build_visual_aux(self):
         # build a sphere of distance_threshold size around the target
         self.target = self.robot.world.position_targets[self.robot.id]
-        print(pyb.createMultiBody(baseMass=0,
-                            baseVisualShapeIndex=pyb.createVisualShape(shapeType=pyb.GEOM_SPHERE, radius=self.distance_threshold, rgbaColor=[0, 1, 0, 1]),
-                            basePosition=self.target))
+        self.visual_aux_radius = ShapeCache.quantize([self.distance_threshold])
+        self.visual_aux_obj_id = pyb.createMultiBody(baseMass=0,
+                            baseVisualShapeIndex=ShapeCache.get_visual_shape(pyb.GEOM_SPHERE, [self.distance_threshold], [0, 1, 0, 1]),
+                            basePosition=self.target)
+
+    def update_visual_aux(self):
+        # the sphere can only be moved if its size, the distance threshold, stayed the same
+        if ShapeCache.quantize([self.distance_threshold]) != self.visual_aux_radius:
+            pyb.removeBody(self.visual_aux_obj_id)
+            self.build_visual_aux()
+            return
+        self.target = self.robot.world.position_targets[self.robot.id]
+        pyb.resetBasePositionAndOrientation(self.visual_aux_obj_id, self.target, [0, 0, 0, 1])
 
     def get_data_for_logging(self) -> dict:
         logging_dict = dict()
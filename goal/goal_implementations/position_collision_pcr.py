@@ -3,6 +3,8 @@ import numpy as np
 from gym.spaces import Box
 import pybullet as pyb
 from numpy import newaxis as na
+from goal.goal_utils import project_onto_cuboids
+from world.obstacles.shape_cache import ShapeCache
 import time
 
 
@@ -24,6 +26,18 @@ class PositionCollisionPCR(Goal):
         except KeyError:
             self.add_full_skeleton_to_obs = False
 
+        # how to compute the distances between robot skeleton and obstacles
+        # "cuboid" projects the skeleton onto the obstacle cuboids of the point cloud sensor
+        # "sdf" looks them up in the signed distance field of the world (needs sdf_resolution in the world config)
+        # "closest_points" queries PyBullet for the exact closest points between the robot links and nearby obstacles
+        self.distance_backend = goal_config.get("distance_backend", "cuboid")
+        # radius in meters around the robot in which the closest_points backend looks for obstacles, anything further
+        # away is reported at this distance
+        self.closest_points_radius = goal_config.get("closest_points_radius", 0.5)
+        # object ids of the table(s), ignored by the closest_points backend for some skeleton points, None to use the
+        # table_ids of the world
+        self.closest_points_table_ids = goal_config.get("closest_points_table_ids", None)
+
         # set pcr and robot skeleton sensor to make retrieving data easier later on
         for sensor in self.robot.sensors:
             if str(type(
@@ -71,6 +85,12 @@ class PositionCollisionPCR(Goal):
         # set indices of the robot skeleton points that should consider the table
         self.sklt_indx_consider_table = [4, 5, 6, 7, 8, 9, 13, 14, 15]
 
+        # preallocated array for the projections of the skeleton onto the obstacle cuboids
+        self.projection_buffer = None
+
+        # robot link of each skeleton point, set on the first use of the closest_points backend
+        self.sklt_links = None
+
         # stuff for debugging
         self.debug = goal_config["debug"]
 
@@ -155,7 +175,7 @@ class PositionCollisionPCR(Goal):
                 target_pos = self.normalize_coordinates(self.target)
                 end_effector_position = self.normalize_coordinates(self.position)
                 ee_target_delta = (target_pos - end_effector_position) / 2
-                robot_sklt = self.normalize_coordinates(self.robot_skeleton_sensor.robot_skeleton)
+                robot_sklt = self.normalize_coordinates(self.robot_skeleton_sensor.require("goal").robot_skeleton)
                 robot_sklt_projections = self.normalize_coordinates(self.closest_projections)
                 sklt_projection_delta = (robot_sklt_projections - robot_sklt) / 2
                 return {"target_position": target_pos,
@@ -242,12 +262,21 @@ class PositionCollisionPCR(Goal):
     def build_visual_aux(self):
         # build a sphere of distance_threshold size around the target
         self.target = self.robot.world.position_targets[self.robot.id]
+        self.visual_aux_radius = ShapeCache.quantize([self.distance_threshold])
         self.visual_aux_obj_id = pyb.createMultiBody(baseMass=0,
-                                                     baseVisualShapeIndex=pyb.createVisualShape(
-                                                         shapeType=pyb.GEOM_SPHERE, radius=self.distance_threshold,
-                                                         rgbaColor=[0, 1, 0, 1]),
+                                                     baseVisualShapeIndex=ShapeCache.get_visual_shape(
+                                                         pyb.GEOM_SPHERE, [self.distance_threshold], [0, 1, 0, 1]),
                                                      basePosition=self.target)
 
+    def update_visual_aux(self):
+        # the sphere can only be moved if its size, the distance threshold, stayed the same
+        if ShapeCache.quantize([self.distance_threshold]) != self.visual_aux_radius:
+            pyb.removeBody(self.visual_aux_obj_id)
+            self.build_visual_aux()
+            return
+        self.target = self.robot.world.position_targets[self.robot.id]
+        pyb.resetBasePositionAndOrientation(self.visual_aux_obj_id, self.target, [0, 0, 0, 1])
+
     def get_data_for_logging(self) -> dict:
         logging_dict = dict()
         logging_dict["reward_" + self.robot.name] = self.reward_value
@@ -262,53 +291,29 @@ class PositionCollisionPCR(Goal):
         """
         Set the closest obstacle cuboid and the shortest distance between robot skeleton and obstacle cuboids.
         """
+        if self.distance_backend == "sdf":
+            self._set_min_distance_to_obstacle_sdf()
+            return
+        if self.distance_backend == "closest_points":
+            self._set_min_distance_to_obstacle_closest_points()
+            return
+
         # retrieve robot skeleton and obstacle cuboids
-        robot_sklt = self.robot_skeleton_sensor.robot_skeleton
+        robot_sklt = self.robot_skeleton_sensor.require("goal").robot_skeleton
         # obstacles: [x_max, x_min, y_max, y_min, z_max, z_min, length, depth, height, x_center, y_center, z_center]
-        obstacle_cuboids = self.pcr_sensor.obstacle_cuboids
-        obstacles_expanded = self.pcr_sensor.obstacle_cuboids[:, :, na].repeat(robot_sklt.shape[0], axis=2)
-
-        # check relative x position
-        is_to_right = robot_sklt[:, 0] > obstacles_expanded[:, 0, :]
-        is_to_left = robot_sklt[:, 0] < obstacles_expanded[:, 1, :]
-        # check relative y position
-        is_infront = robot_sklt[:, 1] > obstacles_expanded[:, 2, :]
-        is_behind = robot_sklt[:, 1] < obstacles_expanded[:, 3, :]
-        # check relative z position
-        is_above = robot_sklt[:, 2] > obstacles_expanded[:, 4, :]
-        is_below = robot_sklt[:, 2] < obstacles_expanded[:, 5, :]
-
-        # set array containt the projections; should have shape n_of_obstacles x n_robot_skeleton_points x 3
-        robot_sklt_projections = robot_sklt[na, :, :].repeat(obstacles_expanded.shape[0], axis=0)
-
-        # if is_to_right x_projection = x_max; if is_to_left x_projection = x_min
-        robot_sklt_projections[:, :, 0] = np.where(is_to_right, obstacles_expanded[:, 0, :],
-                                                   robot_sklt_projections[:, :, 0])
-        robot_sklt_projections[:, :, 0] = np.where(is_to_left, obstacles_expanded[:, 1, :],
-                                                   robot_sklt_projections[:, :, 0])
-
-        # if is_infront y_projection = y_max; if is_behind y_projection = y_min
-        robot_sklt_projections[:, :, 1] = np.where(is_infront, obstacles_expanded[:, 2, :],
-                                                   robot_sklt_projections[:, :, 1])
-        robot_sklt_projections[:, :, 1] = np.where(is_behind, obstacles_expanded[:, 3, :],
-                                                   robot_sklt_projections[:, :, 1])
-
-        # if is_above z_projection = z_max; if is_below z_projection = z_min
-        robot_sklt_projections[:, :, 2] = np.where(is_above, obstacles_expanded[:, 4, :],
-                                                   robot_sklt_projections[:, :, 2])
-        robot_sklt_projections[:, :, 2] = np.where(is_below, obstacles_expanded[:, 5, :],
-                                                   robot_sklt_projections[:, :, 2])
-
-        # take the squared difference between projection and origin
-        distances_proj_origin = np.square(robot_sklt_projections - robot_sklt)
-
-        # set the differences for the projections on the table for the skeleton points that should ignore collision
+        obstacle_cuboids = self.pcr_sensor.require("goal").obstacle_cuboids
+
+        # projections onto and distances to each cuboid; shapes n_of_obstacles x n_robot_skeleton_points (x 3)
+        buffer_shape = (obstacle_cuboids.shape[0], robot_sklt.shape[0], 3)
+        buffer_dtype = np.result_type(robot_sklt, obstacle_cuboids)
+        if self.projection_buffer is None or self.projection_buffer.shape != buffer_shape or self.projection_buffer.dtype != buffer_dtype:
+            self.projection_buffer = np.empty(buffer_shape, dtype=buffer_dtype)
+        robot_sklt_projections, distances_proj_origin = project_onto_cuboids(robot_sklt, obstacle_cuboids, out=self.projection_buffer)
+
+        # set the distances for the projections on the table for the skeleton points that should ignore collision
         # with the table to infinity; this will make sure that these are not selected as the minimal distances
         # note that this assumes the table to be the obstacle at index 0
-        distances_proj_origin[0, self.sklt_indx_ignore_table, :] = np.inf
-
-        # finish the computation of the distances between projection and origin by summing and taking the root
-        distances_proj_origin = np.sqrt(distances_proj_origin.sum(axis=2))
+        distances_proj_origin[0, self.sklt_indx_ignore_table] = np.inf
 
         # index of the closest obstacle cuboid
         min_idx_cuboid = distances_proj_origin.min(axis=1).argmin()
@@ -317,8 +322,8 @@ class PositionCollisionPCR(Goal):
         min_idk_sklt = distances_proj_origin[min_idx_cuboid, :].argmin()
 
         # get closest projection
-        self.closest_projection = robot_sklt_projections[min_idx_cuboid, min_idk_sklt, :]
-        self.closest_projections = robot_sklt_projections[min_idx_cuboid, :, :]
+        self.closest_projection = robot_sklt_projections[min_idx_cuboid, min_idk_sklt, :].copy()
+        self.closest_projections = robot_sklt_projections[min_idx_cuboid, :, :].copy()
 
         # closest robot skeleton point
         self.closest_robot_skeleton_point = robot_sklt[min_idk_sklt, :]
@@ -371,6 +376,103 @@ class PositionCollisionPCR(Goal):
             draw_line(self.closest_obstacle_cuboid[-3:],
                       self.closest_obstacle_cuboid[-3:] + np.array([0, 0, 0.3]))
 
+    def _set_min_distance_to_obstacle_sdf(self):
+        """
+        Same as _set_min_distance_to_obstacle_and_closest_cuboid, but using the signed distance field of the world.
+        The projections are the skeleton points moved along the negative gradient by their distance.
+        """
+        sdf = self.robot.world.sdf
+        robot_sklt = self.robot_skeleton_sensor.require("goal").robot_skeleton
+
+        distances = np.empty(robot_sklt.shape[0], dtype=np.float32)
+        gradients = np.empty(robot_sklt.shape, dtype=np.float32)
+        distances[self.sklt_indx_ignore_table], gradients[self.sklt_indx_ignore_table] = \
+            sdf.query(robot_sklt[self.sklt_indx_ignore_table], ignore_ids=sdf.table_ids)
+        distances[self.sklt_indx_consider_table], gradients[self.sklt_indx_consider_table] = \
+            sdf.query(robot_sklt[self.sklt_indx_consider_table])
+
+        # points inside of obstacles count as touching them, just like for the cuboids
+        distances = np.maximum(distances, 0)
+        # without any obstacle to consider the distance is infinite, such points count as far away and are their own
+        # projection
+        no_obstacle = ~np.isfinite(distances)
+        distances[no_obstacle] = sdf.extent
+        gradients[no_obstacle] = 0
+        robot_sklt_projections = robot_sklt - distances[:, na] * gradients
+
+        min_idk_sklt = distances.argmin()
+        self.closest_projection = robot_sklt_projections[min_idk_sklt, :]
+        self.closest_projections = robot_sklt_projections
+        self.closest_robot_skeleton_point = robot_sklt[min_idk_sklt, :]
+        self.min_distance_to_obstacles = distances[min_idk_sklt]
+
+    def _set_min_distance_to_obstacle_closest_points(self):
+        """
+        Same as _set_min_distance_to_obstacle_and_closest_cuboid, but using the exact closest points between the robot
+        links and the obstacles. Only obstacles whose AABBs overlap the robot's AABB grown by closest_points_radius are
+        queried, with one getClosestPoints call per obstacle.
+        The distance of a skeleton point is the one of its link, its projection is the point moved by the offset between
+        the link's closest point pair. Points without an obstacle in range get the radius as distance and a projection
+        the radius below them.
+        """
+        robot_id = self.robot.object_id
+        robot_sklt = self.robot_skeleton_sensor.require("goal").robot_skeleton
+        radius = self.closest_points_radius
+        if self.sklt_links is None:
+            self.sklt_links = self._get_skeleton_links(robot_id)
+
+        # broadphase: obstacles overlapping the robot's AABB grown by the radius
+        robot_aabbs = np.array([pyb.getAABB(robot_id, link) for link in range(-1, pyb.getNumJoints(robot_id))])
+        overlapping = pyb.getOverlappingObjects(robot_aabbs[:, 0].min(axis=0) - radius, robot_aabbs[:, 1].max(axis=0) + radius)
+        obstacles = set(self.robot.world.objects_ids)
+        candidates = {object_id for object_id, _ in overlapping or [] if object_id in obstacles}
+
+        # closest point pair per robot link, separately for the table(s) and all other obstacles
+        n_links = pyb.getNumJoints(robot_id)
+        link_distances = np.full((2, n_links), radius, dtype=np.float32)
+        link_offsets = np.zeros((2, n_links, 3), dtype=np.float32)
+        link_offsets[:, :, 2] = -radius
+        table_ids = self.closest_points_table_ids if self.closest_points_table_ids is not None else self.robot.world.table_ids
+        for object_id in candidates:
+            is_table = int(object_id in table_ids)
+            for point in pyb.getClosestPoints(robot_id, object_id, radius):
+                link, distance = point[3], point[8]
+                if link >= 0 and distance < link_distances[is_table, link]:
+                    link_distances[is_table, link] = distance
+                    link_offsets[is_table, link] = np.subtract(point[6], point[5])
+
+        # per skeleton point, the table only counts for the points that consider it
+        distances = link_distances[0, self.sklt_links]
+        offsets = link_offsets[0, self.sklt_links]
+        table_distances = link_distances[1, self.sklt_links[self.sklt_indx_consider_table]]
+        use_table = table_distances < distances[self.sklt_indx_consider_table]
+        distances[self.sklt_indx_consider_table] = np.where(use_table, table_distances, distances[self.sklt_indx_consider_table])
+        offsets[self.sklt_indx_consider_table] = np.where(use_table[:, na], link_offsets[1, self.sklt_links[self.sklt_indx_consider_table]],
+                                                          offsets[self.sklt_indx_consider_table])
+
+        # penetrations count as touching, just like for the cuboids
+        distances = np.maximum(distances, 0)
+        robot_sklt_projections = robot_sklt + offsets
+
+        min_idk_sklt = distances.argmin()
+        self.closest_projection = robot_sklt_projections[min_idk_sklt, :]
+        self.closest_projections = robot_sklt_projections
+        self.closest_robot_skeleton_point = robot_sklt[min_idk_sklt, :]
+        self.min_distance_to_obstacles = distances[min_idk_sklt]
+
+    @staticmethod
+    def _get_skeleton_links(robot_id):
+        """
+        Returns the link index of each point of the full robot skeleton, in the order of the RobotSkeletonSensor.
+        """
+        links = []
+        for i in range(1, pyb.getNumJoints(robot_id)):
+            # links 2 and 3 contribute their center of mass and their link frame
+            links += [i] if i == 1 or i >= 4 else [i, i]
+        # the interpolated points along the upper and the lower arm
+        links += [2] * 4 + [3] * 3
+        return np.array(links)
+
     @staticmethod
     def encode_cuboid_pcr(cuboid, points_per_plane=16):
         # has to have an even square root
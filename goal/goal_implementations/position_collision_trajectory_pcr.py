@@ -5,6 +5,7 @@ import numpy as np
 from gym.spaces import Box
 import pybullet as pyb
 from numpy import newaxis as na
+from goal.goal_utils import project_onto_cuboids
 import time
 
 
@@ -72,6 +73,9 @@ class PositionCollisionTrajectoryPCR(Goal):
         # set indices of the robot skeleton points that should consider the table
         self.sklt_indx_consider_table = [1, 2]
 
+        # preallocated array for the projections of the skeleton onto the obstacle cuboids
+        self.projection_buffer = None
+
         # stuff for debugging
         self.debug = goal_config["debug"]
 
@@ -232,52 +236,21 @@ class PositionCollisionTrajectoryPCR(Goal):
         Set the closest obstacle cuboid and the shortest distance between robot skeleton and obstacle cuboids.
         """
         # retrieve robot skeleton and obstacle cuboids
-        robot_sklt = self.robot_skeleton_sensor.robot_skeleton
+        robot_sklt = self.robot_skeleton_sensor.require("goal").robot_skeleton
         # obstacles: [x_max, x_min, y_max, y_min, z_max, z_min, length, depth, height, x_center, y_center, z_center]
-        obstacle_cuboids = self.pcr_sensor.obstacle_cuboids
-        obstacles_expanded = self.pcr_sensor.obstacle_cuboids[:, :, na].repeat(robot_sklt.shape[0], axis=2)
-
-        # check relative x position
-        is_to_right = robot_sklt[:, 0] > obstacles_expanded[:, 0, :]
-        is_to_left = robot_sklt[:, 0] < obstacles_expanded[:, 1, :]
-        # check relative y position
-        is_infront = robot_sklt[:, 1] > obstacles_expanded[:, 2, :]
-        is_behind = robot_sklt[:, 1] < obstacles_expanded[:, 3, :]
-        # check relative z position
-        is_above = robot_sklt[:, 2] > obstacles_expanded[:, 4, :]
-        is_below = robot_sklt[:, 2] < obstacles_expanded[:, 5, :]
-
-        # set array containt the projections; should have shape n_of_obstacles x n_robot_skeleton_points x 3
-        robot_sklt_projections = robot_sklt[na, :, :].repeat(obstacles_expanded.shape[0], axis=0)
-
-        # if is_to_right x_projection = x_max; if is_to_left x_projection = x_min
-        robot_sklt_projections[:, :, 0] = np.where(is_to_right, obstacles_expanded[:, 0, :],
-                                                   robot_sklt_projections[:, :, 0])
-        robot_sklt_projections[:, :, 0] = np.where(is_to_left, obstacles_expanded[:, 1, :],
-                                                   robot_sklt_projections[:, :, 0])
-
-        # if is_infront y_projection = y_max; if is_behind y_projection = y_min
-        robot_sklt_projections[:, :, 1] = np.where(is_infront, obstacles_expanded[:, 2, :],
-                                                   robot_sklt_projections[:, :, 1])
-        robot_sklt_projections[:, :, 1] = np.where(is_behind, obstacles_expanded[:, 3, :],
-                                                   robot_sklt_projections[:, :, 1])
-
-        # if is_above z_projection = z_max; if is_below z_projection = z_min
-        robot_sklt_projections[:, :, 2] = np.where(is_above, obstacles_expanded[:, 4, :],
-                                                   robot_sklt_projections[:, :, 2])
-        robot_sklt_projections[:, :, 2] = np.where(is_below, obstacles_expanded[:, 5, :],
-                                                   robot_sklt_projections[:, :, 2])
-
-        # take the squared difference between projection and origin
-        distances_proj_origin = np.square(robot_sklt_projections - robot_sklt)
-
-        # set the differences for the projections on the table for the skeleton points that should ignore collision
+        obstacle_cuboids = self.pcr_sensor.require("goal").obstacle_cuboids
+
+        # projections onto and distances to each cuboid; shapes n_of_obstacles x n_robot_skeleton_points (x 3)
+        buffer_shape = (obstacle_cuboids.shape[0], robot_sklt.shape[0], 3)
+        buffer_dtype = np.result_type(robot_sklt, obstacle_cuboids)
+        if self.projection_buffer is None or self.projection_buffer.shape != buffer_shape or self.projection_buffer.dtype != buffer_dtype:
+            self.projection_buffer = np.empty(buffer_shape, dtype=buffer_dtype)
+        robot_sklt_projections, distances_proj_origin = project_onto_cuboids(robot_sklt, obstacle_cuboids, out=self.projection_buffer)
+
+        # set the distances for the projections on the table for the skeleton points that should ignore collision
         # with the table to infinity; this will make sure that these are not selected as the minimal distances
         # note that this assumes the table to be the obstacle at index 0
-        distances_proj_origin[0, self.sklt_indx_ignore_table, :] = np.inf
-
-        # finish the computation of the distances between projection and origin by summing and taking the root
-        distances_proj_origin = np.sqrt(distances_proj_origin.sum(axis=2))
+        distances_proj_origin[0, self.sklt_indx_ignore_table] = np.inf
 
         # index of the closest obstacle cuboid
         min_idx_cuboid = distances_proj_origin.min(axis=1).argmin()
@@ -286,8 +259,8 @@ class PositionCollisionTrajectoryPCR(Goal):
         min_idk_sklt = distances_proj_origin[min_idx_cuboid, :].argmin()
 
         # get closest projection
-        self.closest_projection = robot_sklt_projections[min_idx_cuboid, min_idk_sklt, :]
-        self.closest_projections = robot_sklt_projections[min_idx_cuboid, :, :]
+        self.closest_projection = robot_sklt_projections[min_idx_cuboid, min_idk_sklt, :].copy()
+        self.closest_projections = robot_sklt_projections[min_idx_cuboid, :, :].copy()
 
         # closest projection in spherical coordinates with respect to shoulder, elbow and ee
         delta = robot_sklt - self.closest_projection
@@ -0,0 +1,22 @@
+import numpy as np
+from numpy import newaxis as na
+
+
+def project_onto_cuboids(points: np.ndarray, cuboids: np.ndarray, out: np.ndarray = None):
+    """
+    Projects points onto axis aligned cuboids, the projection being the point of the cuboid closest to the point.
+    Points inside of a cuboid are their own projection. Leading batch dimensions (e.g. for vectorized envs) are
+    broadcast between points and cuboids.
+    :param points: shape [..., n_points, 3]
+    :param cuboids: shape [..., n_cuboids, 12], format of the point cloud sensor:
+    [x_max, x_min, y_max, y_min, z_max, z_min, length, depth, height, x_center, y_center, z_center]
+    :param out: optional preallocated array of shape [..., n_cuboids, n_points, 3] the projections are written into
+    :return: the projections in the shape [..., n_cuboids, n_points, 3] and the distances between the points and their
+    projections in the shape [..., n_cuboids, n_points]
+    """
+    cuboids_max = cuboids[..., :, na, 0:6:2]
+    cuboids_min = cuboids[..., :, na, 1:6:2]
+    points = points[..., na, :, :]
+    projections = np.clip(points, cuboids_min, cuboids_max, out=out)
+    distances = np.sqrt(np.square(projections - points).sum(axis=-1))
+    return projections, distances
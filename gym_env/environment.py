@@ -9,6 +9,8 @@ from robot.robot import Robot
 from sensor.sensor import Sensor
 from goal.goal import Goal
 from world.world import World
+from world.obstacles.shape_cache import ShapeCache
+from world.obstacles.human import Human
 
 # import implementations, new ones hav to be added to the registries to work
 #   worlds
@@ -16,7 +18,8 @@ from world import WorldRegistry
 #   robots
 from robot import RobotRegistry
 #   sensors
-from sensor import SensorRegistry
+from sensor import SensorRegistry, SensorGraph
+from sensor.camera import CameraBase, RenderScheduler
 #   goals
 from goal import GoalRegistry
 
@@ -49,6 +52,13 @@ class ModularDRLEnv(gym.Env):
         self.stat_buffer_size = env_config["stat_buffer_size"]  
         # in seconds -> inverse is frame rate in Hz
         self.sim_step = env_config["sim_step"]  
+        # whether to keep the simulation for the next episode if the world's scene doesn't change, see World.episode_changes
+        self.incremental_reset = env_config.get("incremental_reset", False)
+        # whether to keep pooled obstacle bodies and cached shapes across episodes instead of resetting the simulation,
+        # None to do so for worlds that support it
+        self.reuse_bodies = env_config.get("reuse_bodies", None)
+        # whether the simulation holds a complete scene that an incremental reset can reuse
+        self.scene_built = False
 
         # tracking variables
         self.episode = 0
@@ -78,8 +88,13 @@ class ModularDRLEnv(gym.Env):
         world_type = env_config["world"]["type"]
         world_config = env_config["world"]["config"]
         world_config["sim_step"] = self.sim_step
+        # index and number of parallel envs, used e.g. to give each env its own shard of a scenario bank
+        world_config["worker_id"] = env_config.get("worker_id", 0)
+        world_config["num_workers"] = env_config.get("num_workers", 1)
         
         self.world = WorldRegistry.get(world_type)(world_config)
+        if self.reuse_bodies is None:
+            self.reuse_bodies = self.world.supports_body_reuse
 
         # init robots and their associated sensors and goals from config
         self.robots = []
@@ -154,6 +169,22 @@ class ModularDRLEnv(gym.Env):
                 new_sensor = SensorRegistry.get(sensor_type)(sensor_config)
                 self.sensors.append(new_sensor)
 
+        # graph that only updates the sensors whose data is accessed in a step
+        # the two mandatory sensors of each robot are read by the robots and worlds, so they are always updated
+        self.sensor_graph = SensorGraph(env_config.get("lazy_sensors", False))
+        for sensor in self.sensors:
+            mandatory = any(sensor is robot.joints_sensor or sensor is robot.position_rotation_sensor for robot in self.robots)
+            self.sensor_graph.add(sensor, eager=mandatory)
+
+        # optional central scheduler that spreads the renders of the cameras over the steps
+        # at most render_budget cameras render per step, the others keep their last frame
+        self.render_scheduler = None
+        if env_config.get("render_budget", None) is not None:
+            self.render_scheduler = RenderScheduler(env_config["render_budget"])
+            for sensor in self.sensors:
+                if isinstance(sensor, CameraBase):
+                    self.render_scheduler.register(sensor)
+
         # register robots with the world
         self.world.register_robots(self.robots)
 
@@ -199,87 +230,155 @@ class ModularDRLEnv(gym.Env):
         self.cpu_epoch = time()
         self.reward = 0
         self.reward_cumulative = 0
+        # after the first episode, point out the sensors nothing read, a lazy graph never updates them
+        if self.episode == 1 and self.sensor_graph.lazy:
+            unused = self.sensor_graph.get_unused_sensors()
+            if unused:
+                print("Sensors whose data was never read in the first episode: " + ", ".join(type(sensor).__name__ for sensor in unused))
         self.episode += 1
         if self.max_episodes == -1:  # if we have a finite amount of episodes, we want the log to hold everything, otherwise flush it for the next one
             self.log = []  
 
-        # build the world and robots
-        # this is put into a loop that will only break if the generation process results in a collision free setup
-        # the code will abort if even after several attempts no valid starting setup is found
-        # TODO: maybe find a smarter way to do this
-        reset_count = 0
-        while True:
-            if reset_count > 1000:
-                raise Exception("Could not find collision-free starting setup after 1000 tries. Maybe check your world generation code.")
-
-            # reset PyBullet
-            pyb.resetSimulation()
-
-            # reset world attributes
-            self.world.reset(np.average(self.success_stat))
-
-            # spawn robots in world
-            for robot in self.robots:
-                robot.build()
-
-            # get a set of starting positions for the end effectors
-            ee_starting_points = self.world.create_ee_starting_points()
+        # worlds whose scene stays the same over episodes can keep all of their bodies, only the robots, moving obstacles
+        # and targets are reset then, see World.episode_changes
+        incremental = self.incremental_reset and self.scene_built and "scene" not in self.world.episode_changes()
+        if incremental:
+            incremental = self._reset_incremental()
+
+        if not incremental:
+            # build the world and robots
+            # this is put into a loop that will only break if the generation process results in a collision free setup
+            # the code will abort if even after several attempts no valid starting setup is found
+            # TODO: maybe find a smarter way to do this
+            reset_count = 0
+            while True:
+                if reset_count > 1000:
+                    raise Exception("Could not find collision-free starting setup after 1000 tries. Maybe check your world generation code.")
+
+                # without body reuse the simulation is reset anyway, empty the pools before the world releases its
+                # obstacles such that their bodies aren't parked just to be removed
+                if not self.reuse_bodies:
+                    ShapeCache.invalidate()
+                    Human.invalidate_pool()
+
+                # reset world attributes, with body reuse this hands the obstacle bodies back to their pools
+                self.world.reset(np.average(self.success_stat))
+
+                # empty the simulation for the new build
+                self._clear_simulation()
+
+                # spawn robots in world
+                for robot in self.robots:
+                    robot.build()
+
+                # get a set of starting positions for the end effectors
+                ee_starting_points = self.world.create_ee_starting_points()
             
-            # get position and rotation goals
-            position_targets = self.world.create_position_target()
-            rotation_targets = self.world.create_rotation_target()
+                # get position and rotation goals
+                position_targets = self.world.create_position_target()
+                rotation_targets = self.world.create_rotation_target()
 
-            # spawn world objects
-            self.world.build()
+                # spawn world objects
+                self.world.build()
 
-            # set the robots into the starting positions
-            for idx, robot in enumerate(self.robots):
-                if ee_starting_points[idx][0] is None:
-                    continue  # nothing to do here
-                elif ee_starting_points[idx][1] is None:
-                    # only position
-                    self.robots[idx].moveto_xyz(ee_starting_points[idx][0], False)
-                else:
-                    # both position and rotation
-                    self.robots[idx].moveto_xyzquat(ee_starting_points[idx][0], ee_starting_points[idx][1], False)
+                # set the robots into the starting positions
+                self._move_to_starting_points(ee_starting_points)
             
-            # check collision
-            self.world.perform_collision_check()
-            if not self.world.collision:
-                break
-            else:
-                reset_count += 1
+                # check collision
+                self.world.perform_collision_check()
+                if not self.world.collision:
+                    break
+                else:
+                    reset_count += 1
+
+            # bake the static obstacles into the distance field, for an incremental reset they are still the same
+            if self.world.sdf_resolution is not None:
+                self.world.build_sdf()
+            self.scene_built = True
 
         # set all robots to active
         self.active_robots = [True for robot in self.robots]
 
         # reset the sensors to start settings
+        self.sensor_graph.reset()
         for sensor in self.sensors:
             sensor.reset()
+        if self.render_scheduler is not None:
+            self.render_scheduler.reset()
 
         # call the goals' update routine and get their metrics, if they exist
         self.goal_metrics = []
         for goal in self.goals:
             self.goal_metrics.append(goal.on_env_reset(np.average(self.success_stat), self.episode))
 
-        # render non-essential visual stuff
-        if self.show_auxillary_geometry_world:
+        # render non-essential visual stuff, after an incremental reset it still exists and only the goals' has to move
+        if self.show_auxillary_geometry_world and not incremental:
             self.world.build_visual_aux()
         if self.show_auxillary_geometry_goal:
             for goal in self.goals:
-                goal.build_visual_aux()
+                if incremental:
+                    goal.update_visual_aux()
+                else:
+                    goal.build_visual_aux()
 
         # turn rendering back on
         pyb.configureDebugVisualizer(pyb.COV_ENABLE_RENDERING, 1)
 
         return self._get_obs()
 
+    def _clear_simulation(self):
+        """
+        Empties the simulation before a new build. With reuse_bodies only the bodies that are not parked in the pools of
+        ShapeCache and Human are removed, such that they and all cached shapes can be reused. Otherwise PyBullet is reset,
+        the pools have been emptied before the world reset in that case.
+        """
+        if not self.reuse_bodies:
+            pyb.resetSimulation()
+            return
+        parked = ShapeCache.prune() | Human.prune()
+        # PyBullet hands out freed ids last in first out, removing the highest ids first gives the bodies built next the
+        # same ids as after a reset (configs refer to the robot, plane and table by id)
+        for body_id in sorted([pyb.getBodyUniqueId(idx) for idx in range(pyb.getNumBodies())], reverse=True):
+            if body_id not in parked:
+                pyb.removeBody(body_id)
+        # resetSimulation would remove these as well
+        pyb.removeAllUserDebugItems()
+
+    def _reset_incremental(self) -> bool:
+        """
+        Starts a new episode in the existing simulation, for worlds whose scene stays the same over episodes.
+        Returns whether a collision free setup was found, if not the env falls back to a full reset.
+        """
+        for _ in range(100):
+            self.world.reset_episode(np.average(self.success_stat))
+            for robot in self.robots:
+                robot.reset_joints()
+            ee_starting_points = self.world.create_ee_starting_points()
+            self.world.create_position_target()
+            self.world.create_rotation_target()
+            self._move_to_starting_points(ee_starting_points)
+            self.world.perform_collision_check()
+            if not self.world.collision:
+                return True
+        return False
+
+    def _move_to_starting_points(self, ee_starting_points):
+        for idx, robot in enumerate(self.robots):
+            if ee_starting_points[idx][0] is None:
+                continue  # nothing to do here
+            elif ee_starting_points[idx][1] is None:
+                # only position
+                self.robots[idx].moveto_xyz(ee_starting_points[idx][0], False)
+            else:
+                # both position and rotation
+                self.robots[idx].moveto_xyzquat(ee_starting_points[idx][0], ee_starting_points[idx][1], False)
+
     def _get_obs(self):
         obs_dict = dict()
         # get the sensor data
         for sensor in self.sensors:
             if sensor.add_to_observation_space:
-                obs_dict = {**obs_dict, **sensor.get_observation()}
+                obs_dict = {**obs_dict, **sensor.require("observation").get_observation()}
         for goal in self.goals:
             if goal.add_to_observation_space:
                 obs_dict = {**obs_dict, **goal.get_observation()}
@@ -294,6 +393,7 @@ class ModularDRLEnv(gym.Env):
         action = np.array(action)
         
         # update world
+        self.world.update_counter += 1
         self.world.update()
 
         # apply the action to all robots that have to be moved
@@ -311,9 +411,8 @@ class ModularDRLEnv(gym.Env):
                 pyb.stepSimulation()
             exec_times_cpu.append(exec_time)
 
-        # update the sensor data
-        for sensor in self.sensors:
-            sensor.update(self.steps_current_episode)
+        # update the sensor data, lazy sensors are updated later on once something reads them
+        self.sensor_graph.begin_step(self.steps_current_episode)
 
         # update the collision model
         self.world.perform_collision_check()
@@ -385,6 +484,7 @@ class ModularDRLEnv(gym.Env):
             info = {"episodes": self.episode,
                     "is_success": is_success, 
                     "collision": collision,
+                    "collision_object_id": self.world.collided_object_id,
                     "timeout": timeout,
                     "out_of_bounds": out_of_bounds,
                     "step": self.steps_current_episode,
@@ -402,7 +502,7 @@ class ModularDRLEnv(gym.Env):
             # get the log data from sensors
             for sensor in self.sensors:
                 if sensor.add_to_logging:
-                    info = {**info, **sensor.get_data_for_logging()}
+                    info = {**info, **sensor.require("logging").get_data_for_logging()}
             # get log data from goals
             for goal in self.goals:
                 if goal.add_to_logging:
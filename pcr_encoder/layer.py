@@ -61,23 +61,23 @@ class GridEncoder(nn.Module):
             cell_indices = indices.clone()
         c = res.shape[1]
 
-        weight = weight.unsqueeze(1).expand_as(res)
-        res = res * weight  # zero out weights of points outside of ball
+        res = res * weight.unsqueeze(1)  # zero out weights of points outside of ball
 
         # sum up features of points inside ball
-        x = torch.zeros(b, c, self.grid_size * self.grid_size * self.grid_size).to(res.device)
-        count = torch.zeros(b, c, self.grid_size * self.grid_size * self.grid_size).to(x)
-        res = res.contiguous().view(b, c, 8 * n)
-        weight = weight.contiguous().view(b, c, 8 * n)
-        indices = indices.view(b, -1)
-        indices.clamp_(0, self.grid_size ** 3)
-        for i in range(b):
-            x[i].index_add_(1, indices[i], res[i])
-            count[i].index_add_(1, indices[i], weight[i])
+        # the cell indices of each sample are offset by sample * grid_size^3 such that the whole batch is scattered at once
+        g3 = self.grid_size * self.grid_size * self.grid_size
+        indices = indices.view(b, -1).clamp(0, g3 - 1)
+        indices = (indices + torch.arange(b, device=indices.device).unsqueeze(1) * g3).view(-1)
+        res = res.contiguous().view(b, c, 8 * n).permute(1, 0, 2).reshape(c, b * 8 * n)
+        x = torch.zeros(c, b * g3, dtype=res.dtype, device=res.device)
+        x.index_add_(1, indices, res)
+        # the weights are the same for all channels, so the count is only computed once
+        count = torch.zeros(b * g3, dtype=res.dtype, device=res.device)
+        count.index_add_(0, indices, weight.contiguous().view(-1).to(res))
 
         # number of points should have no effect
-        count = torch.max(count, torch.tensor([1.0]).to(weight.device))
-        x /= count
+        x = x / count.clamp(min=1.0)
+        x = x.view(c, b, g3).permute(1, 0, 2).contiguous()
 
         x = x.view(b, -1, self.grid_size, self.grid_size, self.grid_size)  # b x c x grid_size x grid_size x grid_size
 
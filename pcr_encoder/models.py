@@ -1,9 +1,31 @@
+from collections import OrderedDict
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as fn
 
 from . import layer
 
+
+# loads the pretrained autoencoder from a state dict, also strips the "module." prefix of DataParallel checkpoints
+def load_pretrained(path, device="cpu"):
+    net = GridAutoEncoderAdaIN(rnd_dim=2, enc_p=0, dec_p=0.2, adain_layer=None).to(device)
+    state_dict = torch.load(path, map_location=device)
+
+    new_state_dict = OrderedDict()
+    changed = False
+    for k, v in state_dict.items():
+        if k[:7] == "module.":
+            changed = True
+            new_state_dict[k[7:]] = v
+        else:
+            new_state_dict[k] = v
+    if changed:
+        state_dict = new_state_dict
+    net.load_state_dict(state_dict)
+    net.eval()
+    return net
+
 class GridAutoEncoderAdaIN(nn.Module):
     def __init__(self, rnd_dim=2, h_dim=62, enc_p=0, dec_p=0, adain_layer=None, filled_cls=True):
         super().__init__()
@@ -172,9 +194,8 @@ class GridAutoEncoderAdaIN(nn.Module):
         if self.filled_cls:
             filled = torch.sigmoid(dens_cls).round()
             dens_ = filled * dens
-            for i in range(b):
-                if dens_[i].sum().item() < 1e-12:
-                    dens_[i] = dens[i]
+            empty = dens_.view(b, -1).sum(-1) < 1e-12
+            dens_ = torch.where(empty.view(b, 1, 1, 1, 1), dens, dens_)
         else:
             dens_ = dens
 
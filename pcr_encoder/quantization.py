@@ -0,0 +1,154 @@
+"""
+Export of an int8 CPU version of the pretrained point cloud autoencoder.
+
+The Conv3d encoder stack is statically quantized (FX graph mode, calibrated on point clouds of random cuboids like the
+obstacles in our worlds) and the linear layer producing the decoder parameters is dynamically quantized. The grid
+encoder, decoder and point generator stay in fp32.
+
+Usage: python -m pcr_encoder.quantization [--input STATE] [--output MODEL] [--calibration NPY]
+Besides writing the model, this reports the Chamfer distance of the reconstructed point clouds and the relative error of
+the latents to the fp32 model as well as the latency of both models.
+"""
+import copy
+from argparse import ArgumentParser
+from time import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+from . import models
+
+PRETRAINED_PATH = "pcr_encoder/models/pretrained/model_full_transformations.state"
+QUANTIZED_PATH = "pcr_encoder/models/pretrained/model_full_transformations_int8.pt"
+
+# largest deviations of the int8 model from the fp32 one that are accepted, the mean Chamfer distance of the
+# reconstructions (in the unit cube the clouds are normalized to) and the mean relative error of the latents
+MAX_CHAMFER_DISTANCE = 0.01
+MAX_LATENT_ERROR = 0.1
+
+
+# samples n_points on the surface of n_clouds random cuboids, normalized like the inputs of the point cloud sensor
+# returns a tensor [n_clouds x 3 x n_points]
+def random_cuboid_clouds(n_clouds, n_points=1000):
+    clouds = []
+    for _ in range(n_clouds):
+        half_extents = np.random.uniform(0.05, 0.5, size=3)
+        points = np.random.uniform(-half_extents, half_extents, size=(n_points, 3))
+        # push every point onto one of the six faces
+        axis = np.random.randint(3, size=n_points)
+        sign = np.random.choice([-1, 1], size=n_points)
+        points[np.arange(n_points), axis] = sign * half_extents[axis]
+        points = points / (2 * half_extents.max())
+        clouds.append(points.T)
+    return torch.from_numpy(np.stack(clouds).astype(np.float32)).clamp(-0.5, 0.5)
+
+
+def quantize(net, calibration_clouds, engine="fbgemm"):
+    """
+    Returns an int8 copy of the autoencoder for CPU inference.
+    The encoder is calibrated by running the calibration clouds [b x 3 x n] through it.
+    """
+    torch.backends.quantized.engine = engine
+    net = copy.deepcopy(net).cpu().eval()
+
+    with torch.no_grad():
+        grids = net.grid_encoder(calibration_clouds)
+        encoder = prepare_fx(net.encoder, get_default_qconfig_mapping(engine), example_inputs=(grids[:1],))
+        for grid in grids.split(8):
+            encoder(grid)
+        net.encoder = convert_fx(encoder)
+
+    net.adaptive = quantize_dynamic(net.adaptive, {nn.Linear}, dtype=torch.qint8)
+    return net
+
+
+# quantized activations (the ELUs of the encoder) keep their output scale and zero point outside of the state dict
+def activation_qparams(net):
+    state_dict = net.state_dict()
+    return {name: (module.scale, module.zero_point) for name, module in net.named_modules()
+            if hasattr(module, "scale") and name + ".scale" not in state_dict}
+
+
+def export(input_path=PRETRAINED_PATH, output_path=QUANTIZED_PATH, calibration_clouds=None):
+    net = models.load_pretrained(input_path, "cpu")
+    if calibration_clouds is None:
+        calibration_clouds = random_cuboid_clouds(64)
+    net_int8 = quantize(net, calibration_clouds)
+    # pickling the whole FX quantized model doesn't load again, so only its parameters are saved, see load_quantized
+    torch.save({"state_dict": net_int8.state_dict(), "activation_qparams": activation_qparams(net_int8)}, output_path)
+    return net, net_int8
+
+
+def load_quantized(path=QUANTIZED_PATH):
+    # quantizing a fresh autoencoder gives the structure of the int8 model, the scales and zero points of the
+    # calibration are overwritten by the saved ones, so a constant cloud suffices
+    net = quantize(models.GridAutoEncoderAdaIN(rnd_dim=2, enc_p=0, dec_p=0.2, adain_layer=None), torch.zeros(1, 3, 100))
+    checkpoint = torch.load(path, map_location="cpu")
+    net.load_state_dict(checkpoint["state_dict"])
+    modules = dict(net.named_modules())
+    for name, (scale, zero_point) in checkpoint["activation_qparams"].items():
+        modules[name].scale, modules[name].zero_point = scale, zero_point
+    net.eval()
+    return net
+
+
+# symmetric Chamfer distance between two batches of point clouds [b x 3 x n] and [b x 3 x m], averaged over the batch
+def chamfer_distance(a, b):
+    dist = torch.cdist(a.transpose(1, 2), b.transpose(1, 2))
+    return (dist.min(2)[0].mean(1) + dist.min(1)[0].mean(1)).mean().item()
+
+
+# mean relative error of the latents of two batches [b x latent], the second one compared to the first
+def latent_error(latent_fp32, latent_int8):
+    return ((latent_int8 - latent_fp32).norm(dim=1) / latent_fp32.norm(dim=1)).mean().item()
+
+
+def compare(net_fp32, net_int8, clouds, n_points=50, repetitions=20):
+    """
+    Reconstructs the clouds one by one with both models, like the point cloud sensor does, and returns the mean Chamfer
+    distance between the reconstructions as well as the mean latency of both models in seconds.
+    """
+    distances = []
+    latency_fp32 = 0
+    latency_int8 = 0
+    with torch.no_grad():
+        for _ in range(repetitions):
+            for cloud in clouds.split(1):
+                seed = np.random.randint(2 ** 31)
+                torch.manual_seed(seed)
+                t = time()
+                pred_fp32 = net_fp32(cloud, n_points, False)[0]
+                latency_fp32 += time() - t
+                torch.manual_seed(seed)
+                t = time()
+                pred_int8 = net_int8(cloud, n_points, False)[0]
+                latency_int8 += time() - t
+                distances.append(chamfer_distance(pred_fp32, pred_int8))
+    runs = repetitions * clouds.shape[0]
+    return np.mean(distances), latency_fp32 / runs, latency_int8 / runs
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Exports an int8 CPU version of the pretrained point cloud autoencoder.")
+    parser.add_argument("--input", default=PRETRAINED_PATH, help="Path to the pretrained fp32 state dict.")
+    parser.add_argument("--output", default=QUANTIZED_PATH, help="Path the quantized model is written to.")
+    parser.add_argument("--calibration", default=None, help="Optional .npy file with calibration clouds [b x 3 x n] normalized to the unit cube.")
+    args = parser.parse_args()
+
+    calibration = None
+    if args.calibration is not None:
+        calibration = torch.from_numpy(np.load(args.calibration).astype(np.float32))
+    net_fp32, net_int8 = export(args.input, args.output, calibration)
+
+    clouds = random_cuboid_clouds(8)
+    chamfer, latency_fp32, latency_int8 = compare(net_fp32, net_int8, clouds, repetitions=5)
+    with torch.no_grad():
+        latent = latent_error(net_fp32.encode(clouds), net_int8.encode(clouds))
+    print("Chamfer distance fp32 vs int8: {:.5f} (max {})".format(chamfer, MAX_CHAMFER_DISTANCE))
+    print("Relative latent error fp32 vs int8: {:.4f} (max {})".format(latent, MAX_LATENT_ERROR))
+    print("Latency fp32: {:.2f} ms, int8: {:.2f} ms".format(latency_fp32 * 1000, latency_int8 * 1000))
+    if chamfer > MAX_CHAMFER_DISTANCE or latent > MAX_LATENT_ERROR:
+        print("The int8 model deviates too much from the fp32 one, try other calibration clouds")
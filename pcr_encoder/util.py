@@ -10,39 +10,30 @@ sampling_patterns = None
 
 def densSample(d, n):
     b, _, g, _, _ = d.shape
-    out = []
-    for i in range(b):
-        N = torch.zeros(g, g, g).to(d.device)
-        add = torch.ones([n]).to(d.device)
-        d_ = d[i, 0, :, :, :].view(-1)
-        d_sum = d_.sum().item()
-        assert (np.isfinite(d_sum))
-        if d_sum < 1e-12:
-            d_ = torch.ones_like(d_)
-        ind = torch.multinomial(d_, n, replacement=True)
-        N.put_(ind, add, accumulate=True)
-        out.append(N.int())
-    out = torch.stack(out, dim=0)
-    return out
+    d_ = d.view(b, -1)
+    d_sum = d_.sum(-1)
+    assert (torch.isfinite(d_sum).all())
+    # fall back to uniform sampling for empty densities
+    d_ = torch.where((d_sum < 1e-12).unsqueeze(1), torch.ones_like(d_), d_)
+    ind = torch.multinomial(d_, n, replacement=True)
+    # offset the cell indices of each sample such that the whole batch is counted at once
+    ind = ind + torch.arange(b, device=d.device).unsqueeze(1) * g ** 3
+    out = torch.bincount(ind.view(-1), minlength=b * g ** 3)
+    return out.view(b, g, g, g).int()
 
 
 # Calculates a density for the given pointcloud
 def densCalc(x, grid_size):
-    def ravel(coords, dims):
-        return coords[2, :] + (dims[1] * coords[1, :]) + (dims[1] * dims[2] * coords[0, :])
+    b, _, n = x.shape
+    d = grid_size
 
-    res = []
-    for i in range(x.size(0)):
-        inp = x[i, :, :]
-        d = grid_size
-        n = inp.size(1)
-
-        ind = ((inp + 0.5) * d - 0.5).round().clamp(0, d - 1).long()
-        resf = torch.zeros(d ** 3).to(inp)
-        ind = ravel(ind, (d, d, d))
-        resf.index_add_(0, ind, torch.ones(ind.size(0)).to(inp))
-        res.append(resf.reshape((1, 1, d, d, d)) / n)
-    return torch.cat(res, dim=0)
+    ind = ((x + 0.5) * d - 0.5).round().clamp(0, d - 1).long()
+    ind = ind[:, 2, :] + d * ind[:, 1, :] + d * d * ind[:, 0, :]
+    # offset the cell indices of each sample such that the whole batch is scattered at once
+    ind = ind + torch.arange(b, device=x.device).unsqueeze(1) * d ** 3
+    res = torch.zeros(b * d ** 3).to(x)
+    res.index_add_(0, ind.view(-1), torch.ones(b * n).to(x))
+    return res.view(b, 1, d, d, d) / n
 
 
 # creates a grid tensor [3 x s x s x s] containing the 3d coordinate of the elements
@@ -54,14 +45,20 @@ def meshgrid(s):
     return torch.stack([x, y, z], 0)
 
 
-def fixed_sample(n, count):
+def load_sampling_patterns():
     global sampling_patterns
     if sampling_patterns is None:
         dir_path = os.path.dirname(os.path.realpath(__file__))
-        sampling_patterns = pickle.load(open(dir_path + "/samplings.pkl", "rb"))
+        with open(dir_path + "/samplings.pkl", "rb") as f:
+            sampling_patterns = [torch.from_numpy(pattern) for pattern in pickle.load(f)]
+    return sampling_patterns
+
+
+def fixed_sample(n, count):
+    patterns = load_sampling_patterns()
 
     if n < 100:
-        samples = torch.from_numpy(sampling_patterns[n - 1][np.random.randint(10, size=count)])
+        samples = patterns[n - 1][torch.randint(10, (count,))]
         samples = samples.permute(1, 2, 0).contiguous().view(2, -1)
     else:
         samples = torch.tensor(ghalton.GeneralizedHalton(2).get(n * count), dtype=torch.float32).t()
@@ -69,6 +66,14 @@ def fixed_sample(n, count):
     return samples
 
 
+# fits a PCA on latent vectors [n x d], returns the mean [d] and the first n_components principal axes [n_components x d]
+# save both with np.savez(path, mean=mean, components=components) to use them in the point cloud sensor
+def fit_latent_pca(latents, n_components):
+    mean = latents.mean(0)
+    _, _, v = torch.linalg.svd(latents - mean, full_matrices=False)
+    return mean, v[:n_components]
+
+
 def count_params(*nets):
     n = 0
     for net in nets:
@@ -95,6 +95,17 @@ class Robot(ABC):
         """
         pass
 
+    def reset_joints(self):
+        """
+        Puts the already built robot back into its resting pose at standstill, used instead of build when the gym env
+        keeps the simulation for the next episode.
+        """
+        for joint_id, angle in zip(self.joints_ids, self.resting_pose_angles):
+            pyb.resetJointState(self.object_id, joint_id, angle, 0)
+        if self.use_physics_sim:
+            # otherwise the motors would keep driving towards the targets of the last episode
+            pyb.setJointMotorControlArray(self.object_id, self.joints_ids.tolist(), controlMode=pyb.POSITION_CONTROL, targetPositions=self.resting_pose_angles.tolist(), forces=self.joints_forces.tolist())
+
     def set_joint_sensor(self, joints_sensor):
         """
         Simple setter method for the joint sensor of this robot.
@@ -52,14 +52,14 @@ def find_in_features(seq):
 if __name__ == "__main__":
     if run_config["train"]:
         
-        def return_train_env_outer():
+        def return_train_env_outer(worker_id):
             def return_train_env_inner():
-                env = ModularDRLEnv(env_config)
+                env = ModularDRLEnv({**env_config, "worker_id": worker_id, "num_workers": run_config["num_envs"]})
                 return env
             return return_train_env_inner
         
         # create parallel envs
-        envs = SubprocVecEnv([return_train_env_outer() for i in range(run_config["num_envs"])])
+        envs = SubprocVecEnv([return_train_env_outer(i) for i in range(run_config["num_envs"])])
 
         # callbacks
         checkpoint_callback = CheckpointCallback(save_freq=run_config["save_freq"], save_path=run_config["save_folder"], name_prefix=run_config["save_name"])
@@ -1,7 +1,9 @@
 from .positional import *
 from .lidar import *
 from .camera import *
+from .occupancy import *
 from .sensor import Sensor
+from .sensor_graph import SensorGraph
 
 class SensorRegistry:
     _sensor_classes = {}
@@ -24,6 +26,7 @@ class SensorRegistry:
 
 SensorRegistry.register('PositionRotation')(PositionRotationSensor)
 SensorRegistry.register('Joints')(JointsSensor)
+SensorRegistry.register('LidarSensorGeneric')(LidarSensorGeneric)
 SensorRegistry.register('LidarSensorUR5')(LidarSensorUR5)
 SensorRegistry.register('LidarSensorUR5Explainable')(LidarSensorUR5_Explainable)
 SensorRegistry.register('LidarSensorUR5Real')(LidarSensorUR5Real)
@@ -33,4 +36,5 @@ SensorRegistry.register('FloatingFollowEffector')(StaticFloatingCameraFollowEffe
 SensorRegistry.register('BuddyRobotCamera')(BuddyRobotCamera)
 SensorRegistry.register('StaticPointCloudCamera')(StaticPointCloudCamera)
 SensorRegistry.register('RobotSkeletonSensor')(RobotSkeletonSensor)
-SensorRegistry.register('VelocitySensor')(VelocitySensor)
\ No newline at end of file
+SensorRegistry.register('VelocitySensor')(VelocitySensor)
+SensorRegistry.register('OccupancyGridSensor')(OccupancyGridSensor)
\ No newline at end of file
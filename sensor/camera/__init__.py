@@ -1,5 +1,6 @@
 from __future__ import annotations
 from .camera import CameraBase
+from .render_scheduler import RenderScheduler
 from .camera_implementations.static_cameras import *
 from .camera_implementations.on_robot_cameras import *
 from .camera_implementations.buddy_robot_cameras import *
@@ -26,6 +26,14 @@ class CameraBase(Sensor):
 
     param: debug: dict with debug parameters
     """
+
+    # number of image channels per camera type
+    nr_channels = {
+        'grayscale' : 1,
+        'rgb' : 3,
+        'rgbd': 4,
+    }
+
     def __init__(self, sensor_config):
         super().__init__(sensor_config)
         self.pos = sensor_config["position"] if sensor_config["position"] is not None else [0,0,0]
@@ -47,6 +55,9 @@ class CameraBase(Sensor):
 
         self.current_image = None
 
+        # optional scheduler that decides on which steps this camera renders, gets set by the scheduler itself
+        self.render_scheduler = None
+
     def _parse_camera_args(self, camera_args : CameraArgs):
         default_camera_args : CameraArgs = {
             'width' : 128,
@@ -61,6 +72,8 @@ class CameraBase(Sensor):
         self.camera_args = default_camera_args
         if type(camera_args) is dict:
             self._modify_camera_args(camera_args)
+        else:
+            self._set_intrinsics()
 
 
     def _add_debug_params(self):
@@ -102,52 +115,67 @@ class CameraBase(Sensor):
             # self.debug_lines['left'] = p.addUserDebugLine(self.pos, add_list(self.pos, left_vector), [0, 255, 0])
             # self.debug_lines['up'] = p.addUserDebugLine(self.pos, add_list(self.pos, up_vector), [0,0,255])
 
-    def _set_camera(self):
-        if self.debug.get('position', False) or self.debug.get('orientation', False) or self.debug.get('target', False) or self.debug.get('lines', False):
-            self._use_debug_params()
-
-        viewMatrix = pyb.computeViewMatrix(
-            cameraTargetPosition=self.target,
-            cameraEyePosition= self.pos,
-            cameraUpVector= self.camera_args['up_vector'],
-            )
-
-        projectionMatrix = pyb.computeProjectionMatrixFOV(
+    def _set_intrinsics(self):
+        """
+        Computes the projection matrix and allocates the image buffer. Both only depend on the intrinsic camera
+        arguments, so this only has to be redone if those change.
+        """
+        self.projectionMatrix = pyb.computeProjectionMatrixFOV(
             fov= self.camera_args['fov'],
             aspect=self.camera_args['aspect'],
             nearVal= self.camera_args['near_val'],
             farVal= self.camera_args['far_val'],
             )
 
+        # the image is always kept as uint8, scaling it is left to the policy
+        channels = self.nr_channels.get(self.camera_args['type'], None)
+        self.image_buffer = None
+        if channels is not None:
+            self.image_buffer = np.empty((self.camera_args['height'], self.camera_args['width'], channels), dtype=np.uint8)
 
-        def _set_camera_inner(): # TODO           
-            _, _, rgba, depth, _ = pyb.getCameraImage(
-                width= self.camera_args['width'],
-                height= self.camera_args['height'],
-                viewMatrix= viewMatrix,
-                projectionMatrix= projectionMatrix)
-
-            rgba, depth = np.array(rgba), np.array(depth) # for compatibility with older python versions
-            if self.camera_args['type'] == 'grayscale':
-                r, g, b, a = rgba[:,:,0], rgba[:,:,1], rgba[:,:,2], rgba[:,:,3]/255
-                image = (0.2989 * r + 0.5870 * g + 0.1140 * b)*a
-                image = image[None]
-            if self.camera_args['type'] in ['rgb']:
-                image = rgba[:, :, :3]
-            if self.camera_args['type'] == 'rgbd':
-                image = rgba
-                image[:, :, 3] = depth
+    def _set_camera(self):
+        if self.debug.get('position', False) or self.debug.get('orientation', False) or self.debug.get('target', False) or self.debug.get('lines', False):
+            self._use_debug_params()
 
-            return image
+        # only the view matrix changes with position and target, the projection matrix is cached
+        self.viewMatrix = pyb.computeViewMatrix(
+            cameraTargetPosition=self.target,
+            cameraEyePosition= self.pos,
+            cameraUpVector= self.camera_args['up_vector'],
+            )
 
         self.camera_ready = True
-        return _set_camera_inner
+        return self._render
+
+    def _render(self):
+        """
+        Renders the image with the current matrices into the image buffer and returns a copy of it.
+        """
+        _, _, rgba, depth, _ = pyb.getCameraImage(
+            width= self.camera_args['width'],
+            height= self.camera_args['height'],
+            viewMatrix= self.viewMatrix,
+            projectionMatrix= self.projectionMatrix)
+
+        # depending on the PyBullet build the image comes as a flat list or as an array
+        rgba = np.reshape(rgba, (self.camera_args['height'], self.camera_args['width'], 4))
+        if self.camera_args['type'] == 'grayscale':
+            self.image_buffer[:, :, 0] = np.dot(rgba[:, :, :3], [0.2989, 0.5870, 0.1140]) * (rgba[:, :, 3] / 255)
+        if self.camera_args['type'] == 'rgb':
+            self.image_buffer[:] = rgba[:, :, :3]
+        if self.camera_args['type'] == 'rgbd':
+            self.image_buffer[:, :, :3] = rgba[:, :, :3]
+            self.image_buffer[:, :, 3] = np.reshape(depth, (self.camera_args['height'], self.camera_args['width'])) * 255
+
+        # the frame is handed out as observation, consumers may keep it (e.g. frame stacking), so the next render must
+        # not overwrite it, steps that don't render share the frame of the last render
+        return self.image_buffer.copy()
 
     def _get_image(self):
         if not self.camera_ready:
             self.camera = self._set_camera()
         self.image = self.camera()
-        return self.image/255 if self.normalize else self.image 
+        return self.image
 
     def _move(self, position = None, orientation = None, target = None):
         self.pos = self.pos if position is None else position 
@@ -164,25 +192,28 @@ class CameraBase(Sensor):
             if new_arg is not None:
                 #assert type(new_arg) == type(self.camera_args[key]), f'Old type <{type(self.camera_args[key])}> is different from new type <{type(new_arg)}>'
                 self.camera_args[key] = new_arg
+        self._set_intrinsics()
         return copy.copy(self.camera_args)
 
     def get_observation_space_element(self) -> Dict:
-        nr_channels = {
-            'grayscale' : 1,
-            'rgb' : 3,
-            'rgbd': 4,
-        }
-        low = 0
-        high = 1 if self.normalize else 255
-        return {self.output_name : spaces.Box(low=low, high= high, shape=(128,128,nr_channels[self.camera_args['type']],), dtype=np.uint8),}
+        shape = (self.camera_args['height'], self.camera_args['width'], self.nr_channels[self.camera_args['type']],)
+        return {self.output_name : spaces.Box(low=0, high=255, shape=shape, dtype=np.uint8),}
         
 
     def get_observation(self):
         return {self.output_name : self.current_image}
 
+    def _should_render(self, step) -> bool:
+        """
+        Whether to render a new image in this step, otherwise the last one is kept.
+        """
+        if self.render_scheduler is None:
+            return step % self.update_steps == 0
+        return self.render_scheduler.request_render(self, step)
+
     def update(self, step):
         self.cpu_epoch = time()
-        if step % self.update_steps == 0:
+        if self._should_render(step):
             self._adapt_to_environment()
             self.current_image = self._get_image()
         self.cpu_time = time() - self.cpu_epoch
@@ -192,6 +223,8 @@ class CameraBase(Sensor):
     def reset(self):
         self.cpu_epoch = time()
         self._adapt_to_environment()
+        # render the first image of the episode, such that there is a frame until the next scheduled render
+        self.current_image = self._get_image()
         self.cpu_time = time() - self.cpu_epoch
 
     def _normalize(self):
@@ -12,7 +12,7 @@ import pandas as pd
 import torch
 import math
 
-from pcr_encoder import models
+from pcr_encoder import models, quantization
 from collections import OrderedDict
 from gym.spaces import Box
 
@@ -52,8 +52,11 @@ def normalize_batch(points):
 
 class StaticPointCloudCamera(CameraBase):
     def __init__(self, sensor_config):
-        # whether to use GPU or not
+        # whether to use GPU or not, falls back to the CPU on machines without one
         self.use_gpu = sensor_config["use_gpu"]
+        if self.use_gpu and not torch.cuda.is_available():
+            print("No GPU available, the point cloud sensor will run on the CPU")
+            self.use_gpu = False
 
         super().__init__(sensor_config)
 
@@ -78,7 +81,7 @@ class StaticPointCloudCamera(CameraBase):
         # target
         self.target = sensor_config["target"]
 
-        # what type of encoding to use NN, cuboid, or None
+        # what type of encoding to use NN, latent, cuboid, or None
         self.pcr_encoding = sensor_config["pcr_encoding"]
 
         # whether to update the matrices or not
@@ -94,17 +97,24 @@ class StaticPointCloudCamera(CameraBase):
         # set camera matrices once
         self._set_camera()
 
+        # region of interest, world space box [x_min, x_max, y_min, y_max, z_min, z_max] or "workspace" for the
+        # workspace boundaries of the world, only the part of the image that this box projects to is rendered
+        self.roi = sensor_config.get("roi", None)
+        if self.roi == "workspace":
+            world = self.robot.world
+            self.roi = [world.x_min, world.x_max, world.y_min, world.y_max, world.z_min, world.z_max]
+        # adaptive resolution, the image is rendered with its resolution scaled by coarse_resolution_scale as long as
+        # all obstacles are further than fine_resolution_distance away from the robot skeleton, None to disable
+        self.coarse_resolution_scale = sensor_config.get("coarse_resolution_scale", None)
+        self.fine_resolution_distance = sensor_config.get("fine_resolution_distance", 0.3)
+        self.robot_skeleton_sensor = None
+
         # create the arrays used when taking the images and when creating the pcr to make code faster
-        self.depth = np.empty(self.img_resolution, dtype=np.float32)
-        self.seg_img_full = np.empty(self.img_resolution, dtype=int)
-        self.W = np.arange(0, self.width)
-        self.H = np.arange(0, self.height)
-        self.X = ((2 * self.W - self.width) / self.width)[na, :].repeat(self.height, axis=0).flatten()
-        self.Y = (-1 * (2 * self.H - self.height) / self.height)[:, na].repeat(self.width, axis=1).flatten()
-        self.PixPos = np.empty((self.img_resolution, 4), dtype=np.float32)
-        self.PixPos[:, 0] = self.X
-        self.PixPos[:, 1] = self.Y
-        self.PixPos[:, 3] = np.ones(self.img_resolution)
+        # there is one set of arrays per render level, level 0 is the fine one
+        self.render_levels = [self._create_render_level(1)]
+        if self.coarse_resolution_scale is not None:
+            self.render_levels.append(self._create_render_level(self.coarse_resolution_scale))
+        self._use_render_level(0)
 
         # encoded point cloud
         self.n_points_encoded_obstacle_pcr = sensor_config["n_points_encoded_obstacle_pcr"]
@@ -115,36 +125,64 @@ class StaticPointCloudCamera(CameraBase):
         # ])
 
         self.device = "cuda:0" if self.use_gpu else "cpu"
+        # path of the pretrained fp32 encoder
+        self.encoder_path = sensor_config.get("encoder_path", quantization.PRETRAINED_PATH)
+        # whether to use the int8 CPU version of the encoder, the point cloud itself is still built on self.device
+        self.encoder_quantized = sensor_config.get("encoder_quantized", False)
+        self.encoder_quantized_path = sensor_config.get("encoder_quantized_path", quantization.QUANTIZED_PATH)
+        self.net_device = "cpu" if self.encoder_quantized else self.device
         # load the encoder
-        if self.pcr_encoding == "NN":
-            self.net = models.GridAutoEncoderAdaIN(rnd_dim=2,
-                                              enc_p=0,
-                                              dec_p=0.2,
-                                              adain_layer=None).to(self.device)
-            total_params = 0
-            for param in self.net.parameters():
-                total_params += np.prod(param.size())
-            print("Network parameters: {}".format(total_params))
-            state_dict = torch.load("pcr_encoder/models/pretrained/model_full_transformations.state")
-
-            new_state_dict = OrderedDict()
-            changed = False
-            for k, v in state_dict.items():
-                if k[:7] == "module.":
-                    changed = True
-                    new_state_dict[k[7:]] = v
-                else:
-                    new_state_dict[k] = v
-            if changed:
-                state_dict = new_state_dict
-            self.net.load_state_dict(state_dict)
-            self.net.eval()
-
-        if self.use_gpu:
-            self.PixPos = torch.from_numpy(self.PixPos).to("cuda:0")
-            self.depth = torch.empty(self.img_resolution, dtype=torch.float32).to("cuda:0")
-            self.seg_img_full = torch.empty(self.img_resolution, dtype=torch.int).to("cuda:0")
-
+        if self.pcr_encoding == "NN" or self.pcr_encoding == "latent":
+            self._load_encoder()
+
+        # settings for the latent encoding, only used if pcr_encoding is "latent"
+        # the latent of the autoencoder is used directly as observation, skipping the decoder and the point generation
+        # number of obstacles whose latents are put into the observation, unused slots are filled with zeros
+        self.n_latent_obstacles = sensor_config.get("n_latent_obstacles", 1)
+        # number of latents that are kept in the cache
+        self.latent_cache_size = sensor_config.get("latent_cache_size", 64)
+        # grid size in meters used to quantize the points of an object before hashing them for the cache
+        self.latent_cache_resolution = sensor_config.get("latent_cache_resolution", 0.005)
+        # optional path to a .npz file with the mean and components of a PCA used to reduce the latent
+        self.latent_pca_path = sensor_config.get("latent_pca_path", None)
+        self.latent_cache = OrderedDict()
+        self.latent_pca_mean = None
+        self.latent_pca_components = None
+        self.latent_dim = 1024
+        if self.pcr_encoding == "latent":
+            if self.latent_pca_path is not None:
+                pca = np.load(self.latent_pca_path)
+                self.latent_pca_mean = torch.from_numpy(pca["mean"].astype(np.float32)).to(self.net_device)
+                self.latent_pca_components = torch.from_numpy(pca["components"].astype(np.float32)).to(self.net_device)
+                self.latent_dim = self.latent_pca_components.shape[0]
+        self.encoded_latent = np.zeros((self.n_latent_obstacles, self.latent_dim), dtype=np.float32)
+
+        # whether to only recompute the cuboids and encodings of objects that changed since the last update
+        # an object counts as unchanged if the world did not report it as moved and its amount of visible points is the same
+        self.incremental_update = sensor_config.get("incremental_update", False)
+        # per object caches of the incremental update, keyed by segmentation id
+        self.object_pixel_counts = {}
+        self.cuboid_cache = {}
+        self.encoding_cache = {}
+        # segmentation ids whose cached data is still valid
+        self.clean_objects = set()
+        # world update counter at the time of the last update of this sensor
+        self.last_world_update = 0
+
+
+    def _load_encoder(self):
+        """
+        Loads the pretrained point cloud autoencoder, either in fp32 onto the device of this sensor or as the int8 CPU
+        model exported by pcr_encoder/quantization.py.
+        """
+        if self.encoder_quantized:
+            self.net = quantization.load_quantized(self.encoder_quantized_path)
+        else:
+            self.net = models.load_pretrained(self.encoder_path, self.net_device)
+        total_params = 0
+        for param in self.net.parameters():
+            total_params += np.prod(param.size())
+        print("Network parameters: {}".format(total_params))
 
     def _set_camera(self):
         if self.debug.get('position', False) or self.debug.get('orientation', False) or self.debug.get('target', False) or self.debug.get('lines', False):
@@ -170,13 +208,126 @@ class StaticPointCloudCamera(CameraBase):
         if self.use_gpu:
             self.tran_pix_world = torch.from_numpy(self.tran_pix_world).to("cuda:0")
 
+    def _create_render_level(self, scale):
+        """
+        Creates the projection matrix and the arrays for rendering the image with its resolution scaled by scale.
+        If a region of interest is set, the projection matrix is cropped to the part of the image the region projects
+        to, such that only those pixels are rendered.
+        """
+        projection = np.asarray(self.projectionMatrix, dtype=np.float32).reshape([4, 4], order='F')
+        view = np.asarray(self.viewMatrix, dtype=np.float32).reshape([4, 4], order='F')
+
+        # window of the image that is rendered in normalized device coordinates
+        u_min, u_max, v_min, v_max = -1, 1, -1, 1
+        if self.roi is not None:
+            x_min, x_max, y_min, y_max, z_min, z_max = self.roi
+            corners = np.array([[x, y, z, 1] for x in (x_min, x_max) for y in (y_min, y_max) for z in (z_min, z_max)], dtype=np.float32)
+            corners = np.matmul(np.matmul(projection, view), corners.T)
+            # corners behind the camera can't be projected, keep the full image in that case
+            if np.all(corners[3] > 0):
+                ndc = np.clip(corners[:2] / corners[3], -1, 1)
+                u_min, v_min = ndc.min(axis=1)
+                u_max, v_max = ndc.max(axis=1)
+            # a region outside of the view frustum collapses onto an edge of the image, a degenerate window would
+            # produce an inf/nan projection matrix, so keep the full image in that case as well
+            if u_max - u_min < 1e-3 or v_max - v_min < 1e-3:
+                u_min, u_max, v_min, v_max = -1, 1, -1, 1
+
+        # crop matrix, maps the window onto the full range of normalized device coordinates
+        crop = np.eye(4, dtype=np.float32)
+        crop[0, 0] = 2 / (u_max - u_min)
+        crop[0, 3] = -(u_max + u_min) / (u_max - u_min)
+        crop[1, 1] = 2 / (v_max - v_min)
+        crop[1, 3] = -(v_max + v_min) / (v_max - v_min)
+        projection = np.matmul(crop, projection)
+
+        # keep the pixel density of the full image (times scale) within the window
+        width = max(1, int(np.ceil(self.camera_args['width'] * scale * (u_max - u_min) / 2)))
+        height = max(1, int(np.ceil(self.camera_args['height'] * scale * (v_max - v_min) / 2)))
+        img_resolution = width * height
+
+        W = np.arange(0, width)
+        H = np.arange(0, height)
+        PixPos = np.empty((img_resolution, 4), dtype=np.float32)
+        PixPos[:, 0] = ((2 * W - width) / width)[na, :].repeat(height, axis=0).flatten()
+        PixPos[:, 1] = (-1 * (2 * H - height) / height)[:, na].repeat(width, axis=1).flatten()
+        PixPos[:, 3] = np.ones(img_resolution)
+        tran_pix_world = np.linalg.inv(np.matmul(projection, view))
+
+        level = {
+            "width": width,
+            "height": height,
+            "projection_matrix": projection.flatten(order='F').tolist(),
+            "tran_pix_world": tran_pix_world,
+            "PixPos": PixPos,
+            "depth": np.empty(img_resolution, dtype=np.float32),
+            "seg_img_full": np.empty(img_resolution, dtype=int),
+        }
+        if self.use_gpu:
+            level["tran_pix_world"] = torch.from_numpy(tran_pix_world).to("cuda:0")
+            level["PixPos"] = torch.from_numpy(PixPos).to("cuda:0")
+            level["depth"] = torch.empty(img_resolution, dtype=torch.float32).to("cuda:0")
+            level["seg_img_full"] = torch.empty(img_resolution, dtype=torch.int).to("cuda:0")
+        return level
+
+    def _use_render_level(self, idx):
+        """
+        Switches the arrays used for rendering and point cloud creation to the render level with the given index.
+        """
+        level = self.render_levels[idx]
+        self.render_level = idx
+        self.width = level["width"]
+        self.height = level["height"]
+        self.img_resolution = self.width * self.height
+        self.render_projection_matrix = level["projection_matrix"]
+        self.tran_pix_world = level["tran_pix_world"]
+        self.PixPos = level["PixPos"]
+        self.depth = level["depth"]
+        self.seg_img_full = level["seg_img_full"]
+
+    def _choose_render_level(self):
+        """
+        Adaptive resolution policy: renders fine if any obstacle cuboid of the last update is closer than
+        fine_resolution_distance to the robot skeleton and coarse otherwise. The table is ignored since the robot is
+        mounted on it.
+        """
+        if len(self.render_levels) == 1:
+            return
+        if self.robot_skeleton_sensor is None:
+            for sensor in self.robot.sensors:
+                if str(type(sensor)) == "<class 'sensor.positional.robot_skeleton_sensor.RobotSkeletonSensor'>":
+                    self.robot_skeleton_sensor = sensor
+        robot_skeleton = None
+        if self.robot_skeleton_sensor is not None:
+            robot_skeleton = self.robot_skeleton_sensor.require("sensor").robot_skeleton
+        if robot_skeleton is None:
+            self._use_render_level(0)
+            return
+
+        # rows of the cuboids are sorted by segmentation id
+        if self.use_gpu:
+            objects = torch.unique(self.segImg).cpu().numpy()
+        else:
+            objects = np.unique(self.segImg)
+        cuboids = self.obstacle_cuboids[objects != 2]
+        if len(cuboids) == 0:
+            self._use_render_level(1)
+            return
+
+        # distance of each skeleton point to each cuboid
+        skeleton = np.asarray(robot_skeleton)[:, na, :]
+        cuboid_max = cuboids[na, :, [0, 2, 4]]
+        cuboid_min = cuboids[na, :, [1, 3, 5]]
+        distances = np.linalg.norm(skeleton - np.clip(skeleton, cuboid_min, cuboid_max), axis=2)
+        self._use_render_level(0 if distances.min() < self.fine_resolution_distance else 1)
+
     def _get_image(self):
         # getting image
         _, _, _, depth, seg = pyb.getCameraImage(
-            width=self.camera_args['width'],
-            height=self.camera_args['height'],
+            width=self.width,
+            height=self.height,
             viewMatrix=self.viewMatrix,
-            projectionMatrix=self.projectionMatrix)
+            projectionMatrix=self.render_projection_matrix)
 
         if self.use_gpu:
             self.depth[:] = torch.flatten(torch.asarray(depth))
@@ -192,14 +343,17 @@ class StaticPointCloudCamera(CameraBase):
 
     def update(self, step):
         self.cpu_epoch = time()
-        if step % self.update_steps == 0:
+        if self._should_render(step):
+            self._choose_render_level()
             # create point cloud
             self.depth, self.seg_img_full = self._get_image()
             self.points = self._depth_img_to_point_cloud(self.depth)
             self.points, self.segImg = self._prepreprocess_point_cloud(self.points, self.seg_img_full)
-            self.obstacle_cuboids = self._pcr_to_cuboids(self.points, self.segImg)
+            self.obstacle_cuboids = self._get_cuboids(self.points, self.segImg)
             if self.pcr_encoding == "NN":
                 self.pcr_encoded = self._encode_pcr_nn(self.points, self.segImg)
+            if self.pcr_encoding == "latent":
+                self.pcr_encoded = self._encode_pcr_latent(self.points, self.segImg)
             if self.pcr_encoding == "cuboid":
                 self.pcr_encoded = self.encode_cuboid_pcr(self.obstacle_cuboids)
         self.cpu_time = time() - self.cpu_epoch
@@ -207,24 +361,36 @@ class StaticPointCloudCamera(CameraBase):
 
     def reset(self):
         self.cpu_epoch = time()
+        # object ids are reused by PyBullet after a reset, so nothing in the caches is valid anymore
+        self.object_pixel_counts = {}
+        self.cuboid_cache = {}
+        self.encoding_cache = {}
+        # obstacles of the new episode are unknown, so always start fine
+        self._use_render_level(0)
         # create point cloud
         self.depth, self.seg_img_full = self._get_image()
         self.points = self._depth_img_to_point_cloud(self.depth)
         self.points, self.segImg = self._prepreprocess_point_cloud(self.points, self.seg_img_full)
-        self.obstacle_cuboids = self._pcr_to_cuboids(self.points, self.segImg)
+        self.obstacle_cuboids = self._get_cuboids(self.points, self.segImg)
         if self.pcr_encoding == "NN":
             self.pcr_encoded = self._encode_pcr_nn(self.points, self.segImg)
+        if self.pcr_encoding == "latent":
+            self.pcr_encoded = self._encode_pcr_latent(self.points, self.segImg)
         if self.pcr_encoding == "cuboid":
             self.pcr_encoded = self.encode_cuboid_pcr(self.obstacle_cuboids)
         self.cpu_time = time() - self.cpu_epoch
         return {"point_cloud": self.points}
 
     def get_observation_space_element(self) -> Dict:
+        if self.add_to_observation_space and self.pcr_encoding == "latent":
+            return {"obstacle_latent": Box(low=-np.inf, high=np.inf, shape=(self.n_latent_obstacles, self.latent_dim), dtype=np.float32)}
         if self.add_to_observation_space:
             return {"obstacle_pcr": Box(low=np.array([-1, -1, 1], dtype=np.float32)[na, :].repeat(self.n_points_encoded_obstacle_pcr, axis=0),
                                                     high=np.array([1, 1, 2], dtype=np.float32)[na, :].repeat(self.n_points_encoded_obstacle_pcr, axis=0),
                                                     shape=(self.n_points_encoded_obstacle_pcr, 3), dtype=np.float32)}
     def get_observation(self):
+        if self.add_to_observation_space and self.pcr_encoding == "latent":
+            return {"obstacle_latent": self.encoded_latent}
         if self.add_to_observation_space:
             return {"obstacle_pcr": self.encoded_pcr}
 
@@ -333,15 +499,80 @@ class StaticPointCloudCamera(CameraBase):
             self.obstacle_cuboids = df.to_numpy().astype(np.float32)
         return self.obstacle_cuboids
 
-    def _encode_pcr_nn(self, points, segImg):
-        # remove table if there is at least 2 non table points otherwise removing everything but the table
+    def _get_cuboids(self, points, segImg):
+        """
+        Returns the obstacle cuboids, either computed from scratch or incrementally.
+        """
+        if not self.incremental_update:
+            return self._pcr_to_cuboids(points, segImg)
+        self._update_clean_objects(segImg)
+        return self._pcr_to_cuboids_incremental(points, segImg)
+
+    def _update_clean_objects(self, segImg):
+        """
+        Determines the objects whose cached cuboids and encodings are still valid. These are the objects managed by the
+        world that did not move since the last update and whose amount of visible points stayed the same, the latter
+        catches changes in occlusion caused by moving objects. Robots are not managed by the world and always recomputed.
+        """
+        world = self.robot.world
+        if self.use_gpu:
+            objects, counts = torch.unique(segImg, return_counts=True)
+        else:
+            objects, counts = np.unique(segImg, return_counts=True)
+        static_objects = set(world.objects_ids) - world.moved_since(self.last_world_update)
+
+        pixel_counts = {}
+        self.clean_objects = set()
+        for object, count in zip(objects.tolist(), counts.tolist()):
+            pixel_counts[object] = count
+            if object in static_objects and self.object_pixel_counts.get(object) == count:
+                self.clean_objects.add(object)
+        self.object_pixel_counts = pixel_counts
+        self.last_world_update = world.update_counter
+
+    def _pcr_to_cuboids_incremental(self, points, segImg):
+        """
+        Same as _pcr_to_cuboids, but only the cuboids of objects that changed are computed, the rest comes from the cache.
+        """
+        objects = sorted(self.object_pixel_counts)
+        dirty = [object for object in objects if object not in self.clean_objects or object not in self.cuboid_cache]
+        if dirty:
+            if self.use_gpu:
+                select_mask = torch.isin(segImg, torch.asarray(dirty, device=segImg.device))
+            else:
+                select_mask = np.isin(segImg, dirty)
+            # rows of _pcr_to_cuboids are sorted by segmentation id, just like dirty
+            cuboids = self._pcr_to_cuboids(points[select_mask], segImg[select_mask])
+            for object, cuboid in zip(dirty, cuboids):
+                self.cuboid_cache[object] = cuboid
+
+        if objects:
+            self.obstacle_cuboids = np.stack([self.cuboid_cache[object] for object in objects]).astype(np.float32)
+        else:
+            self.obstacle_cuboids = np.empty((0, 12), dtype=np.float32)
+        return self.obstacle_cuboids
+
+    @staticmethod
+    def _select_obstacle_points(points, segImg):
+        """
+        Removes the table if there are at least 2 non table points, otherwise removes everything but the table.
+        Works for both numpy arrays and torch tensors.
+        """
         select_mask = segImg != 2
-        if torch.sum(select_mask) > 1:
+        if select_mask.sum() > 1:
             segImg = segImg[select_mask]
             points = points[select_mask]
         else:
-            segImg = segImg[torch.logical_not(select_mask)]
-            points = points[torch.logical_not(select_mask)]
+            segImg = segImg[~select_mask]
+            points = points[~select_mask]
+        return points, segImg
+
+    def _encode_pcr_nn(self, points, segImg):
+        # remove table if there is at least 2 non table points otherwise removing everything but the table
+        points, segImg = self._select_obstacle_points(points, segImg)
+        # without a GPU the point cloud comes as numpy arrays
+        points = torch.as_tensor(points, dtype=torch.float32, device=self.net_device)
+        segImg = torch.as_tensor(segImg, device=self.net_device)
 
         segImg_unique, counts = torch.unique(segImg, return_counts=True)
 
@@ -349,23 +580,79 @@ class StaticPointCloudCamera(CameraBase):
 
         j = 0
         for i, object in enumerate(segImg_unique):
+            # unchanged objects are taken from the cache
+            if self.incremental_update and object.item() in self.clean_objects and object.item() in self.encoding_cache:
+                self.encoded_pcr[i * n_points:n_points * (i + 1), :] = self.encoding_cache[object.item()]
+                continue
             select_mask = segImg == object.item()
             inp = points[select_mask]
             inp = inp[None, :, :]
             inp = torch.swapaxes(inp, 1, 2)
             inp, mean, scale = normalize_batch(inp)
             inp = torch.clamp(inp, -0.5, 0.5)
-            pred, _, _, _ = self.net(inp, n_points, False)
-            pred = undo_normalize(pred, mean, scale)
+            pred, _, _, _ = self.net(inp.to(self.net_device), n_points, False)
+            pred = undo_normalize(pred.to(mean.device), mean, scale)
             pred = torch.squeeze(pred)
             pred = torch.swapaxes(pred, 0, 1)
 
             self.encoded_pcr[i * n_points:n_points * (i + 1), :] = pred.to("cpu").detach()
+            if self.incremental_update:
+                self.encoding_cache[object.item()] = self.encoded_pcr[i * n_points:n_points * (i + 1), :].copy()
         # print(points.shape)
         # colors = np.repeat(np.array([0, 0, 255])[na, :], n_points, axis=0)
         # pyb.addUserDebugPoints(np.asarray(self.encoded_pcr + np.array([0, 0, 0.5])), colors, pointSize=2)
         # sleep(352343)
 
+    def _encode_pcr_latent(self, points, segImg):
+        """
+        Encodes each obstacle of the point cloud into the latent space of the autoencoder, skipping the decoder and the
+        point generation. The latents are written into the slots of self.encoded_latent, unused slots are zero.
+        """
+        points, segImg = self._select_obstacle_points(points, segImg)
+
+        if self.use_gpu:
+            objects = torch.unique(segImg).tolist()
+        else:
+            objects = np.unique(segImg).tolist()
+
+        self.encoded_latent[:] = 0
+        for i, object in enumerate(objects[:self.n_latent_obstacles]):
+            # unchanged objects are taken from the cache without hashing their points
+            if self.incremental_update and object in self.clean_objects and object in self.encoding_cache:
+                self.encoded_latent[i] = self.encoding_cache[object]
+                continue
+            self.encoded_latent[i] = self._get_latent(points[segImg == object])
+            if self.incremental_update:
+                self.encoding_cache[object] = self.encoded_latent[i].copy()
+
+        return self.encoded_latent
+
+    def _get_latent(self, points):
+        """
+        Returns the (optionally PCA reduced) latent of a single object's points.
+        Latents are kept in an LRU cache keyed by a hash of the quantized points, such that obstacles that did not move
+        since the last update are not encoded again.
+        """
+        points_np = points.cpu().numpy() if self.use_gpu else points
+        key = hash(np.round(points_np / self.latent_cache_resolution).astype(np.int32).tobytes())
+        if key in self.latent_cache:
+            self.latent_cache.move_to_end(key)
+            return self.latent_cache[key]
+
+        inp = torch.as_tensor(points, dtype=torch.float32, device=self.net_device)
+        inp = torch.swapaxes(inp[None, :, :], 1, 2)
+        inp, _, _ = normalize_batch(inp)
+        with torch.no_grad():
+            latent = self.net.encode(inp)
+        if self.latent_pca_components is not None:
+            latent = torch.matmul(latent - self.latent_pca_mean, self.latent_pca_components.T)
+        latent = latent[0].cpu().numpy()
+
+        self.latent_cache[key] = latent
+        if len(self.latent_cache) > self.latent_cache_size:
+            self.latent_cache.popitem(last=False)
+        return latent
+
     @staticmethod
     def encode_cuboid_pcr(cuboid, n_points=30):
         # has to be dividable by 6
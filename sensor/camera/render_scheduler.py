@@ -0,0 +1,61 @@
+__all__ = [
+    'RenderScheduler',
+]
+
+class RenderScheduler:
+    """
+    Spreads the renders of several cameras over the env steps to avoid latency spikes on steps where all of them would
+    render at once.
+    Cameras with the same update interval get different phase offsets within that interval and at most render_budget
+    cameras render per step. Cameras that are due but over the budget keep their last frame and render on one of the
+    next steps, the ones waiting the longest first.
+    """
+
+    def __init__(self, render_budget: int = 1):
+        # maximum number of renders per step
+        self.render_budget = render_budget
+
+        # registered cameras, their phase offsets and the step of their last render
+        self.cameras = []
+        self.phases = {}
+        self.last_render = {}
+
+        # cameras allowed to render in the current step
+        self.current_step = None
+        self.allowed = set()
+
+    def register(self, camera):
+        """
+        Puts a camera under the control of this scheduler.
+        """
+        # cameras with the same update interval are spread evenly over it
+        same_interval = [other for other in self.cameras if other.update_steps == camera.update_steps]
+        self.phases[camera] = len(same_interval) % camera.update_steps
+        self.last_render[camera] = self.phases[camera] - camera.update_steps
+        self.cameras.append(camera)
+        camera.render_scheduler = self
+
+    def reset(self):
+        """
+        Restarts the schedule, should be called after the cameras were reset at the start of an episode.
+        """
+        for camera in self.cameras:
+            self.last_render[camera] = self.phases[camera] - camera.update_steps
+        self.current_step = None
+        self.allowed = set()
+
+    def request_render(self, camera, step: int) -> bool:
+        """
+        Returns whether the camera may render in this step. If not, it should keep its last frame.
+        """
+        if step != self.current_step:
+            self.current_step = step
+            # due cameras sorted by how long they are overdue
+            due = [other for other in self.cameras if step - self.last_render[other] >= other.update_steps]
+            due.sort(key=lambda other: self.last_render[other] + other.update_steps)
+            self.allowed = set(due[:self.render_budget])
+
+        if camera in self.allowed:
+            self.last_render[camera] = step
+            return True
+        return False
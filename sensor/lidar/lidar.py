@@ -1,3 +1,4 @@
+import numpy as np
 from sensor.sensor import Sensor
 from robot.robot import Robot
 from time import time
@@ -67,6 +68,17 @@ class LidarSensor(Sensor):
 
         return logging_dict
 
+    def _raw_to_indicator(self, raw_lidar_data):
+        """
+        Converts an array of raw PyBullet lidar values (between 0 and 1) to the indicator buckets in the range of -1 and 1.
+        """
+        raw_bucket_size = 1 / self.indicator_buckets  # 1 is the range of pybullet lidar data (from 0 to 1)
+        indicator_label_diff = 2 / self.indicator_buckets  # 2 is the range of the indicator data (from -1 to 1)
+        # assigns each value a bucket in the range and returns the corresponding bucket in the range of -1 and 1
+        # the round is thrown in there to prevent weird numeric appendages, e.g. 0.200000000004, -0.199999999999 or the like
+        buckets = np.maximum(np.ceil(raw_lidar_data / raw_bucket_size) - 1, 0)
+        return np.where(raw_lidar_data >= 0.99, 1, np.round(buckets * indicator_label_diff - 1, 5))
+
     @abstractmethod
     def _get_lidar_data(self):
         """
@@ -1,2 +1,2 @@
+from .lidar_sensor_generic import *
 from .lidar_sensors_ur5 import *
-
@@ -0,0 +1,118 @@
+import numpy as np
+import pybullet as pyb
+from gym.spaces import Box
+from numpy import newaxis as na
+from ..lidar import LidarSensor
+
+
+__all__ = [
+    'LidarSensorGeneric',
+]
+
+class LidarSensorGeneric(LidarSensor):
+    """
+    Lidar class for any robot. The rays are described by a layout of ray groups, each attached to a link of the robot.
+    A group casts rays into a fan of directions, with one or several parallel rays per direction, and reports the
+    shortest measurement of each direction.
+    A group is a dict with the following keys:
+        link: int, index of the link the rays are attached to
+        origin: list of 3 floats, start of the first ray of each direction in the link frame
+        origin_step: list of 3 floats, offset between the parallel rays of a direction in the link frame, default zeros
+        rays_per_direction: int, number of parallel rays per direction, default 1
+        directions: int, number of directions of the fan
+        angle_range: list of 2 floats, angles in radians of the first and the last direction
+        fan_axes: list of two 3D vectors a and b in the link frame, a direction with angle x is cos(x) * a + sin(x) * b
+    """
+
+    def __init__(self, sensor_config):
+        super().__init__(sensor_config)
+
+        # lidar setup attributes
+        self.ray_start = sensor_config["ray_start"]  # offset of the ray start from the mesh center
+        self.ray_end = sensor_config["ray_end"]  # end of the ray, meaning ray length = ray_end - ray_start
+
+        # compile the layout into ray starts and ends in the frames of the links they are attached to
+        self._compile_ray_layout(sensor_config["ray_layout"])
+
+    def get_observation_space_element(self) -> dict:
+        return {self.output_name: Box(low=-1, high=1, shape=(self.lidar_shape,), dtype=np.float32)}
+
+    def _compile_ray_layout(self, ray_layout: dict):
+        """
+        Precomputes the starts and ends of the rays of each group in homogeneous coordinates of the group's link frame,
+        such that an update only needs one matrix multiplication per group.
+        The rays of a group are ordered by direction, with the parallel rays of one direction next to each other.
+        """
+        self.ray_templates = []
+        for group in ray_layout.values():
+            rays_per_direction = group.get("rays_per_direction", 1)
+            origin_step = np.array(group.get("origin_step", [0, 0, 0]), dtype=np.float64)
+
+            angles = np.linspace(group["angle_range"][0], group["angle_range"][1], group["directions"])
+            axis_a, axis_b = np.array(group["fan_axes"], dtype=np.float64)
+            directions = np.cos(angles)[:, na] * axis_a[na, :] + np.sin(angles)[:, na] * axis_b[na, :]
+
+            # directions x rays_per_direction x 3
+            starts = np.array(group["origin"], dtype=np.float64)[na, na, :] + np.arange(rays_per_direction)[na, :, na] * origin_step[na, na, :]
+            starts = starts.repeat(group["directions"], axis=0)
+            ends = starts + self.ray_end * directions[:, na, :]
+
+            starts = np.concatenate([starts.reshape(-1, 3), np.ones((starts.shape[0] * rays_per_direction, 1))], axis=1).T
+            ends = np.concatenate([ends.reshape(-1, 3), np.ones((ends.shape[0] * rays_per_direction, 1))], axis=1).T
+            self.ray_templates.append((group["link"], starts, ends, rays_per_direction))
+
+        self.num_rays = sum(starts.shape[1] for _, starts, _, _ in self.ray_templates)
+        self.lidar_shape = sum(starts.shape[1] // rays_per_direction for _, starts, _, rays_per_direction in self.ray_templates)
+        self.rays_starts = np.empty((self.num_rays, 3))
+        self.rays_ends = np.empty((self.num_rays, 3))
+
+    def _transform_ray_templates(self):
+        """
+        Transforms the ray templates into world space using the current link frames.
+        """
+        idx = 0
+        for link, starts, ends, _ in self.ray_templates:
+            link_state = pyb.getLinkState(self.robot.object_id, link)
+            frame = np.eye(4)
+            frame[:3, :3] = np.reshape(pyb.getMatrixFromQuaternion(link_state[5]), (3,3))
+            frame[0:3, 3] = link_state[4]
+            n = starts.shape[1]
+            self.rays_starts[idx:idx + n] = np.matmul(frame, starts)[0:3].T
+            self.rays_ends[idx:idx + n] = np.matmul(frame, ends)[0:3].T
+            idx += n
+        return self.rays_starts, self.rays_ends
+
+    def _get_lidar_data(self):
+
+        rays_starts, rays_ends = self._transform_ray_templates()
+
+        results = pyb.rayTestBatch(rays_starts, rays_ends)
+
+        if self.render:
+            hitRayColor = [0, 1, 0]
+            missRayColor = [1, 0, 0]
+
+            pyb.removeAllUserDebugItems()  # this will kill workspace borders if they are displayed
+
+            for index, result in enumerate(results):
+                if result[0] == -1:
+                    pyb.addUserDebugLine(rays_starts[index], rays_ends[index], missRayColor)
+                else:
+                    pyb.addUserDebugLine(rays_starts[index], rays_ends[index], hitRayColor)
+
+        return np.array([result[2] for result in results])  # keeps only the distance information
+
+    def _process_raw_lidar(self, raw_lidar_data):
+        # the rays of one direction sit next to each other, so the minimum per direction is a reshape followed by a min
+        lidar_min = []
+        idx = 0
+        for _, starts, _, rays_per_direction in self.ray_templates:
+            n = starts.shape[1]
+            lidar_min.append(raw_lidar_data[idx:idx + n].reshape(-1, rays_per_direction).min(axis=1))
+            idx += n
+        lidar_min = np.concatenate(lidar_min)
+
+        indicator = self._raw_to_indicator(lidar_min)
+        distances = lidar_min * (self.ray_end - self.ray_start) + self.ray_start
+
+        return indicator, distances
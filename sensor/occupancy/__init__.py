@@ -0,0 +1 @@
+from .occupancy_grid_sensor import OccupancyGridSensor
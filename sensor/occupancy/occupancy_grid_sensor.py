@@ -0,0 +1,172 @@
+import numpy as np
+import pybullet as pyb
+from gym.spaces import Box
+from sensor.sensor import Sensor
+from time import time
+
+__all__ = [
+    'OccupancyGridSensor'
+]
+
+class OccupancyGridSensor(Sensor):
+    """
+    Keeps a voxel occupancy grid over the workspace boundaries of the world.
+    The grid is built either from the AABBs of the world's obstacles, where only obstacles that moved since the last
+    update are rasterized again, or from the points of a StaticPointCloudCamera of the same robot.
+    The grid is stored bit-packed, the observation is the (optionally max-pooled) grid as uint8.
+    """
+
+    def __init__(self, sensor_config):
+        super().__init__(sensor_config)
+
+        self.robot = sensor_config["robot"]
+        self.world = self.robot.world
+
+        # str, "world" for the AABBs of the world obstacles or "pcr" for the points of the point cloud sensor
+        self.source = sensor_config.get("source", "world")
+        # float, edge length of a voxel in meters
+        self.voxel_size = sensor_config["voxel_size"]
+        # int, factor by which the grid is max-pooled along each axis for the observation
+        self.downsample_factor = sensor_config.get("downsample_factor", 1)
+
+        # grid dimensions
+        self.grid_min = np.array([self.world.x_min, self.world.y_min, self.world.z_min], dtype=np.float32)
+        self.grid_max = np.array([self.world.x_max, self.world.y_max, self.world.z_max], dtype=np.float32)
+        self.grid_shape = tuple(np.ceil((self.grid_max - self.grid_min) / self.voxel_size).astype(int))
+        self.num_voxels = int(np.prod(self.grid_shape))
+
+        # number of obstacles occupying each voxel, allows removing a single obstacle from the grid again
+        self.counts = np.zeros(self.num_voxels, dtype=np.uint16)
+        # flat indices of the voxels occupied by each obstacle, keyed by object id
+        self.object_voxels = {}
+        # world update counter at the time of the last update
+        self.last_world_update = 0
+
+        # bit-packed occupancy
+        self.packed = np.zeros(int(np.ceil(self.num_voxels / 8)), dtype=np.uint8)
+
+        # observation
+        f = self.downsample_factor
+        self.observation_shape = tuple(int(np.ceil(n / f)) for n in self.grid_shape)
+        self.pad = [(0, o * f - n) for o, n in zip(self.observation_shape, self.grid_shape)]
+        self.grid_observation = np.zeros(self.observation_shape, dtype=np.uint8)
+
+        self.pcr_sensor = None
+        self.output_name = "occupancy_grid_" + self.robot.name
+
+    def update(self, step) -> dict:
+        self.cpu_epoch = time()
+        if step % self.update_steps == 0:
+            if self.source == "pcr":
+                self._update_from_pcr()
+            else:
+                self._update_from_world(self.world.moved_since(self.last_world_update))
+            self._finish_update()
+        self.cpu_time = time() - self.cpu_epoch
+        return self.get_observation()
+
+    def reset(self):
+        self.cpu_epoch = time()
+        # object ids are reused after a simulation reset, so everything is rasterized again
+        self.counts[:] = 0
+        self.object_voxels = {}
+        if self.source == "pcr":
+            self._update_from_pcr()
+        else:
+            self._update_from_world(set(self.world.objects_ids))
+        self._finish_update()
+        self.cpu_time = time() - self.cpu_epoch
+
+    def get_observation(self) -> dict:
+        return {self.output_name: self.grid_observation}
+
+    def _normalize(self) -> dict:
+        pass  # occupancy is already between 0 and 1
+
+    def get_observation_space_element(self) -> dict:
+        if self.add_to_observation_space:
+            return {self.output_name: Box(low=0, high=1, shape=self.observation_shape, dtype=np.uint8)}
+        return {}
+
+    def get_data_for_logging(self) -> dict:
+        if not self.add_to_logging:
+            return {}
+        logging_dict = dict()
+        logging_dict["occupancy_grid_occupied_voxels_" + self.robot.name] = int(np.count_nonzero(self.counts))
+        logging_dict["occupancy_grid_cpu_time_" + self.robot.name] = self.cpu_time
+        return logging_dict
+
+    def is_occupied(self, points: np.ndarray) -> np.ndarray:
+        """
+        Returns for each of the given points (shape n x 3) whether it lies in an occupied voxel.
+        Points outside of the grid are never occupied.
+        """
+        idx = np.floor((np.asarray(points, dtype=np.float32) - self.grid_min) / self.voxel_size).astype(int)
+        inside = np.all((idx >= 0) & (idx < self.grid_shape), axis=1)
+        occupied = np.zeros(len(idx), dtype=bool)
+        flat = np.ravel_multi_index(idx[inside].T, self.grid_shape)
+        occupied[inside] = (self.packed[flat >> 3] >> (7 - (flat & 7))) & 1
+        return occupied
+
+    def _voxels_of_aabb(self, aabb_min, aabb_max) -> np.ndarray:
+        """
+        Returns the flat indices of all voxels overlapping the given AABB.
+        """
+        low = np.clip(np.floor((np.array(aabb_min) - self.grid_min) / self.voxel_size).astype(int), 0, self.grid_shape)
+        high = np.clip(np.floor((np.array(aabb_max) - self.grid_min) / self.voxel_size).astype(int) + 1, 0, self.grid_shape)
+        if np.any(high <= low):
+            return np.empty(0, dtype=int)
+        x, y, z = np.meshgrid(np.arange(low[0], high[0]), np.arange(low[1], high[1]), np.arange(low[2], high[2]), indexing="ij")
+        return np.ravel_multi_index((x.flatten(), y.flatten(), z.flatten()), self.grid_shape)
+
+    def _update_from_world(self, changed_objects: set):
+        """
+        Rasterizes the AABBs of the given obstacles (all of their links) again, everything else stays as it is.
+        """
+        objects = set(self.world.objects_ids)
+        # obstacles that were removed from the world
+        changed_objects = changed_objects | (set(self.object_voxels) - objects)
+        # obstacles that are new to the grid
+        changed_objects = changed_objects | (objects - set(self.object_voxels))
+
+        for object_id in changed_objects:
+            if object_id in self.object_voxels:
+                self.counts[self.object_voxels.pop(object_id)] -= 1
+            if object_id not in objects:
+                continue
+            voxels = [self._voxels_of_aabb(*pyb.getAABB(object_id, link)) for link in range(-1, pyb.getNumJoints(object_id))]
+            voxels = np.unique(np.concatenate(voxels))
+            self.counts[voxels] += 1
+            self.object_voxels[object_id] = voxels
+        self.last_world_update = self.world.update_counter
+
+    def _update_from_pcr(self):
+        """
+        Rebuilds the grid from the points of the point cloud sensor.
+        """
+        if self.pcr_sensor is None:
+            for sensor in self.robot.sensors:
+                if str(type(sensor)) == "<class 'sensor.camera.camera_implementations.static_point_cloud_camera.StaticPointCloudCamera'>":
+                    self.pcr_sensor = sensor
+        self.counts[:] = 0
+        if self.pcr_sensor is None or self.pcr_sensor.require("sensor").points is None:
+            return
+        points = self.pcr_sensor.points
+        if not isinstance(points, np.ndarray):
+            points = points.cpu().numpy()  # torch tensor of the GPU version
+        idx = np.floor((points - self.grid_min) / self.voxel_size).astype(int)
+        idx = idx[np.all((idx >= 0) & (idx < self.grid_shape), axis=1)]
+        self.counts[np.ravel_multi_index(idx.T, self.grid_shape)] = 1
+
+    def _finish_update(self):
+        """
+        Packs the grid and computes the observation.
+        """
+        occupied = self.counts > 0
+        self.packed[:] = np.packbits(occupied)
+        grid = occupied.reshape(self.grid_shape)
+        f = self.downsample_factor
+        if f > 1:
+            grid = np.pad(grid, self.pad)
+            grid = grid.reshape(self.observation_shape[0], f, self.observation_shape[1], f, self.observation_shape[2], f).any(axis=(1, 3, 5))
+        self.grid_observation[:] = grid
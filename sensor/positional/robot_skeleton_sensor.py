@@ -5,11 +5,17 @@ from numpy import newaxis as na
 from sensor.sensor import Sensor
 from time import time
 
-def interpolate(a, b, n_interpolations, upper_limit, lower_limit):
-    r = (b - a)
+def interpolation_weights(n_points, a, b, n_interpolations, upper_limit, lower_limit):
+    """
+    Returns weights (shape n_interpolations x n_points) that give the points interpolated between the points with
+    indices a and b when multiplied with the points.
+    """
     factor = np.linspace(lower_limit, upper_limit, n_interpolations)
-    a = np.repeat(a[na, :], n_interpolations, axis=0)
-    return a + factor[:, na].dot(r[na, :])
+    weights = np.zeros((n_interpolations, n_points), dtype=np.float32)
+    weights[:, a] = 1 - factor
+    weights[:, b] += factor
+    return weights
+
 
 
 
@@ -21,45 +27,77 @@ class RobotSkeletonSensor(Sensor):
         self.robot = sensor_config["robot"]
         self.debug = sensor_config["debug"]
 
-    def _set_skeleton(self):
+        # set up on the first update, as the robot is not built yet at this point
+        self.robot_id = None
+        self.robot_skeleton = None
+        # ids of the debug lines drawn for the skeleton
+        self.debug_items = []
+
+    def _setup_skeleton(self):
+        """
+        Precomputes which link states make up the skeleton and the weights of the interpolated points,
+        and preallocates the skeleton array.
+        """
         self.robot_id = self.robot.object_id
 
-        robot_skeleton = []
         if self.only_shoulder_elbow_and_ee:
-            # shoulder
-            robot_skeleton.append(pyb.getLinkState(self.robot_id, 2)[4])
-            # elbow
-            robot_skeleton.append(pyb.getLinkState(self.robot_id, 3)[4])
-            # ee
-            robot_skeleton.append(pyb.getLinkState(self.robot_id, 7)[4])
-
-            self.robot_skeleton = np.asarray(robot_skeleton, dtype=np.float32).round(10)
+            # shoulder, elbow and ee
+            self.link_ids = [2, 3, 7]
+            # indices into the queried links and rows of the skeleton of the points using the link frame (link state
+            # [4]) and the center of mass (link state [0]) respectively
+            self.frame_idx = [0, 1, 2]
+            self.frame_rows = [0, 1, 2]
+            self.com_idx = []
+            self.com_rows = []
+            self.interpolation_weights = np.zeros((0, 3), dtype=np.float32)
         else:
-            for i in range(pyb.getNumJoints(self.robot_id)):
-                if i > 0:  # this removes the base link which is somewhere in the air
-                    # the center of mass of the base link (i == 1) floats in the air so we retrieve its frame link
-                    # instead links with an index of 4 or higher have the same coordinates for their link frame and their
-                    # center of mass
-                    if i == 1 or i >= 4:
-                        robot_skeleton.append(pyb.getLinkState(self.robot_id, i)[4])
-                    else:
-                        robot_skeleton.append(pyb.getLinkState(self.robot_id, i)[4])
-                        robot_skeleton.append(pyb.getLinkState(self.robot_id, i)[0])
-
-            self.robot_skeleton = np.asarray(robot_skeleton, dtype=np.float32).round(10)
-
-            # add extra points along the arms of the robot
-            self.robot_skeleton = np.concatenate([
-                self.robot_skeleton,
-                interpolate(self.robot_skeleton[1, :], self.robot_skeleton[2, :], 4, 0.3, 1.5),
-                interpolate(self.robot_skeleton[3, :], self.robot_skeleton[4, :], 3, 0.3, 1.2),
-            ], axis=0).astype(np.float32)
+            # this removes the base link which is somewhere in the air
+            self.link_ids = list(range(1, pyb.getNumJoints(self.robot_id)))
+            self.frame_idx, self.frame_rows, self.com_idx, self.com_rows = [], [], [], []
+            row = 0
+            for idx, link in enumerate(self.link_ids):
+                # the center of mass of the base link (link 1) floats in the air so we retrieve its frame link
+                # instead links with an index of 4 or higher have the same coordinates for their link frame and their
+                # center of mass
+                self.frame_idx.append(idx)
+                self.frame_rows.append(row)
+                row += 1
+                if link in (2, 3):
+                    # shoulder and elbow additionally contribute their center of mass
+                    self.com_idx.append(idx)
+                    self.com_rows.append(row)
+                    row += 1
+
+            # extra points along the arms of the robot
+            self.interpolation_weights = np.concatenate([
+                interpolation_weights(row, 1, 2, 4, 0.3, 1.5),
+                interpolation_weights(row, 3, 4, 3, 0.3, 1.2),
+            ], axis=0)
+
+        self.n_base_points = len(self.frame_rows) + len(self.com_rows)
+        self.robot_skeleton = np.zeros((self.n_base_points + len(self.interpolation_weights), 3), dtype=np.float32)
+
+    def _set_skeleton(self):
+        if self.robot_id != self.robot.object_id or self.robot_skeleton is None:
+            self._setup_skeleton()
+
+        # one query for all links
+        link_states = pyb.getLinkStates(self.robot_id, self.link_ids)
+        base = self.robot_skeleton[:self.n_base_points]
+        base[self.frame_rows] = [link_states[idx][4] for idx in self.frame_idx]
+        if self.com_rows:
+            base[self.com_rows] = [link_states[idx][0] for idx in self.com_idx]
+        np.round(base, 10, out=base)
+        if len(self.interpolation_weights):
+            np.dot(self.interpolation_weights, base, out=self.robot_skeleton[self.n_base_points:])
 
         # display skeleton points
-        pyb.removeAllUserDebugItems()
         if self.debug["skeleton"]:
-            for i, point in enumerate(self.robot_skeleton):
-                pyb.addUserDebugLine(point, point + np.array([0, 0, 0.2]), lineColorRGB=[0, 0, 255])
+            for item in self.debug_items:
+                pyb.removeUserDebugItem(item)
+            self.debug_items = [pyb.addUserDebugLine(point, point + np.array([0, 0, 0.2]), lineColorRGB=[0, 0, 255])
+                                for point in self.robot_skeleton]
+
     def update(self, step) -> dict:
         if step % self.update_steps == 0:
             self._set_skeleton()
@@ -67,6 +105,8 @@ class RobotSkeletonSensor(Sensor):
 
     def reset(self):
         self.cpu_epoch = time()
+        # the debug lines are gone after a simulation reset
+        self.debug_items = []
         self._set_skeleton()
         self.cpu_time = time() - self.cpu_epoch
         return {"robot_skeleton": self.robot_skeleton}
@@ -35,6 +35,9 @@ class Sensor(ABC):
         # see the joint sensor implementation for an example 
         self.update_steps = sensor_config["update_steps"]
 
+        # graph that evaluates this sensor lazily, set by the gym env, None means the sensor is updated every step
+        self.sensor_graph = None
+
         # at the end of init the sensor should also update itself
         # self.update()  # add this in your subclass at the end of __init__ without the comment
 
@@ -81,6 +84,16 @@ class Sensor(ABC):
         """
         pass
 
+    def require(self, consumer: str = None):
+        """
+        Makes sure the data of this sensor is up to date for the current step before it is read.
+        Goals and sensors reading data of other sensors should call this on them first, see SensorGraph.
+        Returns the sensor itself.
+        """
+        if self.sensor_graph is not None:
+            self.sensor_graph.evaluate(self, consumer)
+        return self
+
     def get_data_for_logging(self) -> dict:
         """
         This method can be used to return data in a format that is more useful for logging.
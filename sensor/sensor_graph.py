@@ -0,0 +1,69 @@
+__all__ = [
+    'SensorGraph',
+]
+
+class SensorGraph:
+    """
+    Keeps track of who consumes the data of the sensors of an env and evaluates the sensors lazily.
+    Each step a sensor is updated on the first access of one of its consumers (see Sensor.require) and at most once.
+    Sensors that nobody accesses in a step are skipped.
+    Consumers are the observation, the logging, goals and other sensors. Eager sensors, i.e. the ones read by robots
+    and worlds at the start of the next step, are updated at the start of every step regardless.
+    """
+
+    def __init__(self, lazy: bool = True):
+        # if False, all sensors are eager, which is the same as updating every sensor in every step
+        self.lazy = lazy
+
+        self.sensors = []
+        self.eager_sensors = []
+        # maps each sensor to the names of the consumers that accessed it so far
+        self.consumers = {}
+
+        # current step, None outside of steps (e.g. during the env reset, where all sensors are reset anyway)
+        self.step = None
+        # sensors already evaluated in the current step
+        self.evaluated = set()
+
+    def add(self, sensor, eager: bool = False):
+        """
+        Puts a sensor under the control of this graph.
+        """
+        self.sensors.append(sensor)
+        self.consumers[sensor] = set()
+        if eager or not self.lazy:
+            self.eager_sensors.append(sensor)
+        sensor.sensor_graph = self
+
+    def reset(self):
+        """
+        Leaves the current step, should be called at the start of an episode.
+        """
+        self.step = None
+        self.evaluated = set()
+
+    def begin_step(self, step: int):
+        """
+        Starts a new step and updates the eager sensors.
+        """
+        self.step = step
+        self.evaluated = set()
+        for sensor in self.eager_sensors:
+            self.evaluate(sensor)
+
+    def evaluate(self, sensor, consumer: str = None):
+        """
+        Updates the sensor if it was not yet updated in the current step.
+        """
+        if consumer is not None:
+            self.consumers[sensor].add(consumer)
+        if self.step is None or sensor in self.evaluated:
+            return
+        self.evaluated.add(sensor)
+        sensor.update(self.step)
+
+    def get_unused_sensors(self) -> list:
+        """
+        Returns the sensors none of the consumers accessed so far.
+        """
+        return [sensor for sensor in self.sensors if not self.consumers[sensor] and sensor not in self.eager_sensors]
@@ -0,0 +1,128 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+# importing the goal package pulls in the goal implementations
+pytest.importorskip("pybullet")
+pytest.importorskip("gym")
+from numpy import newaxis as na
+
+from goal.goal_utils import project_onto_cuboids
+
+# skeleton points that ignore the table (cuboid 0), as in the PCR goals
+SKLT_INDX_IGNORE_TABLE = [0, 1, 2, 3]
+
+
+def legacy_projections(robot_sklt, obstacle_cuboids, sklt_indx_ignore_table):
+    """
+    The projection of the PCR goals before project_onto_cuboids, repeats, masks and np.where passes.
+    """
+    obstacles_expanded = obstacle_cuboids[:, :, na].repeat(robot_sklt.shape[0], axis=2)
+
+    is_to_right = robot_sklt[:, 0] > obstacles_expanded[:, 0, :]
+    is_to_left = robot_sklt[:, 0] < obstacles_expanded[:, 1, :]
+    is_infront = robot_sklt[:, 1] > obstacles_expanded[:, 2, :]
+    is_behind = robot_sklt[:, 1] < obstacles_expanded[:, 3, :]
+    is_above = robot_sklt[:, 2] > obstacles_expanded[:, 4, :]
+    is_below = robot_sklt[:, 2] < obstacles_expanded[:, 5, :]
+
+    robot_sklt_projections = robot_sklt[na, :, :].repeat(obstacles_expanded.shape[0], axis=0)
+    robot_sklt_projections[:, :, 0] = np.where(is_to_right, obstacles_expanded[:, 0, :], robot_sklt_projections[:, :, 0])
+    robot_sklt_projections[:, :, 0] = np.where(is_to_left, obstacles_expanded[:, 1, :], robot_sklt_projections[:, :, 0])
+    robot_sklt_projections[:, :, 1] = np.where(is_infront, obstacles_expanded[:, 2, :], robot_sklt_projections[:, :, 1])
+    robot_sklt_projections[:, :, 1] = np.where(is_behind, obstacles_expanded[:, 3, :], robot_sklt_projections[:, :, 1])
+    robot_sklt_projections[:, :, 2] = np.where(is_above, obstacles_expanded[:, 4, :], robot_sklt_projections[:, :, 2])
+    robot_sklt_projections[:, :, 2] = np.where(is_below, obstacles_expanded[:, 5, :], robot_sklt_projections[:, :, 2])
+
+    distances_proj_origin = np.square(robot_sklt_projections - robot_sklt)
+    distances_proj_origin[0, sklt_indx_ignore_table, :] = np.inf
+    distances_proj_origin = np.sqrt(distances_proj_origin.sum(axis=2))
+    return robot_sklt_projections, distances_proj_origin
+
+
+def random_cuboids(rng, n_cuboids):
+    centers = rng.uniform(-1, 1, size=(n_cuboids, 3))
+    half_extents = rng.uniform(0.05, 0.4, size=(n_cuboids, 3))
+    maxs, mins = centers + half_extents, centers - half_extents
+    cuboids = np.empty((n_cuboids, 12))
+    cuboids[:, 0:6:2] = maxs
+    cuboids[:, 1:6:2] = mins
+    cuboids[:, 6:9] = 2 * half_extents
+    cuboids[:, 9:12] = centers
+    return cuboids
+
+
+def random_points(rng, cuboids, n_points):
+    """
+    Points outside of all cuboids, inside of the first one and on faces, edges and corners of the first one.
+    """
+    maxs, mins = cuboids[0, 0:6:2], cuboids[0, 1:6:2]
+    outside = rng.uniform(-2, 2, size=(n_points, 3))
+    inside = rng.uniform(mins, maxs, size=(n_points, 3))
+    on_face = rng.uniform(mins, maxs, size=(n_points, 3))
+    axis = rng.integers(3, size=n_points)
+    on_face[np.arange(n_points), axis] = np.where(rng.random(n_points) < 0.5, mins[axis], maxs[axis])
+    corners = np.where(rng.random((n_points, 3)) < 0.5, mins, maxs)
+    return np.concatenate([outside, inside, on_face, corners])
+
+
+def project_like_goal(robot_sklt, obstacle_cuboids, out=None):
+    projections, distances = project_onto_cuboids(robot_sklt, obstacle_cuboids, out=out)
+    distances[0, SKLT_INDX_IGNORE_TABLE] = np.inf
+    return projections, distances
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_legacy_projection(seed):
+    rng = np.random.default_rng(seed)
+    cuboids = random_cuboids(rng, 6)
+    points = random_points(rng, cuboids, 8)
+
+    legacy_proj, legacy_dist = legacy_projections(points, cuboids, SKLT_INDX_IGNORE_TABLE)
+    proj, dist = project_like_goal(points, cuboids)
+
+    np.testing.assert_allclose(proj, legacy_proj)
+    np.testing.assert_allclose(dist, legacy_dist)
+    assert np.isinf(dist[0, SKLT_INDX_IGNORE_TABLE]).all()
+    # the goals pick the closest cuboid and skeleton point from the distances
+    assert dist.min(axis=1).argmin() == legacy_dist.min(axis=1).argmin()
+    assert dist.argmin() == legacy_dist.argmin()
+
+
+def test_points_inside_and_on_faces_are_their_own_projection():
+    rng = np.random.default_rng(0)
+    cuboids = random_cuboids(rng, 1)
+    points = random_points(rng, cuboids, 10)[10:]
+
+    proj, dist = project_onto_cuboids(points, cuboids)
+
+    np.testing.assert_array_equal(proj[0], points)
+    np.testing.assert_array_equal(dist[0], 0)
+
+
+def test_out_buffer():
+    rng = np.random.default_rng(1)
+    cuboids = random_cuboids(rng, 4)
+    points = random_points(rng, cuboids, 5)
+    out = np.empty((4, len(points), 3))
+
+    proj, dist = project_like_goal(points, cuboids, out=out)
+    legacy_proj, legacy_dist = legacy_projections(points, cuboids, SKLT_INDX_IGNORE_TABLE)
+
+    assert proj is out
+    np.testing.assert_allclose(out, legacy_proj)
+    np.testing.assert_allclose(dist, legacy_dist)
+
+
+def test_batched():
+    rng = np.random.default_rng(2)
+    cuboids = np.stack([random_cuboids(rng, 3) for _ in range(4)])
+    points = np.stack([random_points(rng, cuboids[idx], 4) for idx in range(4)])
+
+    proj, dist = project_onto_cuboids(points, cuboids)
+
+    assert proj.shape == (4, 3, points.shape[1], 3)
+    assert dist.shape == (4, 3, points.shape[1])
+    for idx in range(4):
+        legacy_proj, legacy_dist = legacy_projections(points[idx], cuboids[idx], [])
+        np.testing.assert_allclose(proj[idx], legacy_proj)
+        np.testing.assert_allclose(dist[idx], legacy_dist)
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+pyb = pytest.importorskip("pybullet")
+pytest.importorskip("gym")
+pytest.importorskip("pandas")
+pytest.importorskip("ghalton")
+
+from pcr_encoder import models, quantization
+from sensor.camera.camera_implementations.static_point_cloud_camera import StaticPointCloudCamera
+
+# extent in meters of the obstacle, the NN reconstructions are compared in the unit cube it is normalized to
+OBSTACLE_SIZE = 0.3
+
+
+@pytest.fixture(scope="module")
+def scene():
+    # ids 0 and 1 (ground and a stand-in for the robot) are removed from the point cloud, the table has id 2
+    pyb.connect(pyb.DIRECT)
+    box = lambda half_extents, position: pyb.createMultiBody(
+        baseMass=0, baseCollisionShapeIndex=pyb.createCollisionShape(pyb.GEOM_BOX, halfExtents=half_extents),
+        baseVisualShapeIndex=pyb.createVisualShape(pyb.GEOM_BOX, halfExtents=half_extents), basePosition=position)
+    box([2, 2, 0.01], [0, 0, 0])
+    box([0.05, 0.05, 0.05], [-0.5, -0.5, 1.1])
+    box([0.7, 0.7, 0.5], [0, 0, 0.5])
+    box([OBSTACLE_SIZE / 2, 0.1, 0.1], [0.2, 0.2, 1.2])
+    yield
+    pyb.disconnect()
+
+
+@pytest.fixture(scope="module")
+def encoders(tmp_path_factory):
+    # a randomly initialized autoencoder and its int8 export, the pretrained one is not part of the repo
+    path = tmp_path_factory.mktemp("encoder")
+    torch.manual_seed(0)
+    np.random.seed(0)
+    net = models.GridAutoEncoderAdaIN(rnd_dim=2, enc_p=0, dec_p=0.2, adain_layer=None)
+    torch.save(net.state_dict(), path / "fp32.state")
+    quantization.export(str(path / "fp32.state"), str(path / "int8.pt"), quantization.random_cuboid_clouds(32, 500))
+    return str(path / "fp32.state"), str(path / "int8.pt")
+
+
+def camera_config(encoders, pcr_encoding, quantized):
+    return {
+        "normalize": False, "add_to_observation_space": True, "add_to_logging": False, "sim_step": 0.01,
+        "update_steps": 1, "robot": SimpleNamespace(sensors=[]), "name": "PCR_camera",
+        "position": [0, 0, 2.2], "target": [0, 0, 0], "orientation": None, "debug": None,
+        "camera_args": {"type": "ds", "fov": 100, "width": 64, "height": 64, "up_vector": [0, 1, 0], "near_val": 0.05, "far_val": 1.2},
+        "use_gpu": False, "objects_to_remove": [-1, 0, 1], "pcr_encoding": pcr_encoding,
+        "n_points_encoded_obstacle_pcr": 30, "encoder_path": encoders[0],
+        "encoder_quantized": quantized, "encoder_quantized_path": encoders[1],
+    }
+
+
+def test_int8_latent_matches_fp32(scene, encoders):
+    latents = []
+    for quantized in (False, True):
+        camera = StaticPointCloudCamera(camera_config(encoders, "latent", quantized))
+        camera.reset()
+        latents.append(torch.from_numpy(camera.get_observation()["obstacle_latent"].copy()))
+
+    assert latents[0].abs().sum() > 0
+    assert quantization.latent_error(latents[0], latents[1]) < quantization.MAX_LATENT_ERROR
+
+
+def test_int8_reconstruction_matches_fp32(scene, encoders):
+    reconstructions = []
+    for quantized in (False, True):
+        camera = StaticPointCloudCamera(camera_config(encoders, "NN", quantized))
+        torch.manual_seed(0)
+        camera.reset()
+        reconstructions.append(torch.from_numpy(camera.get_observation()["obstacle_pcr"].astype(np.float32)))
+
+    assert torch.isfinite(reconstructions[0]).all() and torch.isfinite(reconstructions[1]).all()
+    fp32, int8 = [points.T[None] / OBSTACLE_SIZE for points in reconstructions]
+    assert quantization.chamfer_distance(fp32, int8) < quantization.MAX_CHAMFER_DISTANCE
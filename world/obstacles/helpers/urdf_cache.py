@@ -0,0 +1,51 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Callable
+
+# directory holding the generated URDF files
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "generated_urdfs")
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def store_urdf(name: str, urdf: str, key: str = None) -> str:
+    """
+    Writes a URDF into the cache under the given key, by default the hash of its content, and returns its path.
+    The file is written to a temporary file first and moved into place atomically, so parallel workers never read a
+    half written file. Nothing is written if the file is cached already.
+    """
+    key = _hash(urdf) if key is None else key
+    file_name = os.path.join(CACHE_DIR, f"{name}_{key}.urdf")
+    if os.path.exists(file_name):
+        return file_name
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(urdf)
+    os.replace(tmp_name, file_name)
+    return file_name
+
+def write_temporary_urdf(name: str, urdf: str) -> str:
+    """
+    Writes a URDF that is only needed once (e.g. a random maze) into a file of its own and returns its path, the caller
+    should remove the file once it has been loaded.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, file_name = tempfile.mkstemp(dir=CACHE_DIR, prefix=f"{name}_", suffix=".urdf")
+    with os.fdopen(fd, "w") as f:
+        f.write(urdf)
+    return file_name
+
+def get_cached_urdf(name: str, params: dict, generate: Callable[[], str], version: int = 0) -> str:
+    """
+    Returns the path of the URDF for a deterministic generator with the given parameters, generate (returning the URDF
+    as string) is only called if it is not cached yet.
+    The version of the generator is part of the key, bumping it makes files generated by older code unreachable.
+    """
+    key = _hash(json.dumps({"version": version, "params": params}, sort_keys=True, default=str))
+    file_name = os.path.join(CACHE_DIR, f"{name}_{key}.urdf")
+    if os.path.exists(file_name):
+        return file_name
+    return store_urdf(name, generate(), key)
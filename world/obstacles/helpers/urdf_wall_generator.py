@@ -1,6 +1,18 @@
 import pybullet as p
 
 class UrdfWallGenerator:
+    """
+    Generates URDFs made of axis aligned box walls. The fidelity of the generated geometry can be one of
+        "links": one link per wall
+        "compound": all walls in the base link, PyBullet turns them into a single compound collision shape
+        "merged": like compound, but walls that continue each other along an axis are coalesced into one box first
+    The last two look the same as the first one but are a lot cheaper in collision detection.
+    """
+
+    # version of the generated URDFs, has to be increased whenever their content changes such that cached files of older
+    # versions are not used anymore
+    VERSION = 1
+
     def __init__(self) -> None:
         self.segments = []
 
@@ -14,18 +26,40 @@ class UrdfWallGenerator:
             "pos_z": pos_z
         })
 
-    def get_urdf(self):
-        output = f"""
-        <robot name="maze">
-            <link name="base_link">
-               
-            </link>
+    @staticmethod
+    def _merge_along(segments, size_key, pos_key):
+        """
+        Coalesces walls that have the same cross section and touch or overlap along one axis.
         """
+        other_keys = [key for key in ("w", "h", "d", "pos_x", "pos_y", "pos_z") if key not in (size_key, pos_key)]
+        groups = {}
+        for segment in segments:
+            groups.setdefault(tuple(round(segment[key], 9) for key in other_keys), []).append(segment)
 
-        
-        for i, segment in enumerate(self.segments):
-            output += f"""
-                <link name="link_{i}">
+        merged = []
+        for group in groups.values():
+            group.sort(key=lambda segment: segment[pos_key] - segment[size_key] / 2)
+            start, end, current = None, None, None
+            for segment in group:
+                seg_start, seg_end = segment[pos_key] - segment[size_key] / 2, segment[pos_key] + segment[size_key] / 2
+                if current is not None and seg_start <= end + 1e-9:
+                    end = max(end, seg_end)
+                else:
+                    if current is not None:
+                        merged.append({**current, size_key: end - start, pos_key: (start + end) / 2})
+                    start, end, current = seg_start, seg_end, segment
+            merged.append({**current, size_key: end - start, pos_key: (start + end) / 2})
+        return merged
+
+    def get_merged_segments(self):
+        segments = self.segments
+        for size_key, pos_key in (("w", "pos_x"), ("h", "pos_y"), ("d", "pos_z")):
+            segments = self._merge_along(segments, size_key, pos_key)
+        return segments
+
+    @staticmethod
+    def _get_geometry(segment):
+        return f"""
                     <visual>
                         <origin rpy="0 0 0" xyz="{segment["pos_x"]} {segment["pos_y"]} {segment["pos_z"]}"/>
                         <geometry>
@@ -40,7 +74,32 @@ class UrdfWallGenerator:
                         <geometry>
                             <box size="{segment["w"]} {segment["h"]} {segment["d"]}"/>
                         </geometry>
-                    </collision>
+                    </collision>"""
+
+    def get_urdf(self, fidelity="links"):
+        if fidelity != "links":
+            segments = self.get_merged_segments() if fidelity == "merged" else self.segments
+            output = f"""
+        <robot name="maze">
+            <link name="base_link">"""
+            for segment in segments:
+                output += self._get_geometry(segment)
+            output += """
+            </link>
+        </robot>"""
+            return output
+
+        output = f"""
+        <robot name="maze">
+            <link name="base_link">
+
+            </link>
+        """
+
+
+        for i, segment in enumerate(self.segments):
+            output += f"""
+                <link name="link_{i}">{self._get_geometry(segment)}
                 </link>
                 <joint name="joint_{i}" type="fixed">
                     <parent link="base_link"/>
@@ -50,4 +109,4 @@ class UrdfWallGenerator:
                 """
         output += "</robot>"
 
-        return output
\ No newline at end of file
+        return output
@@ -2,18 +2,48 @@ from world.obstacles.obstacle import Obstacle
 import pybullet as pyb
 import numpy as np 
 from typing import Union
-from .human_lib.human.man.man import Man
+from .human_lib.human.man.man import Man, ProxyMan
 from .human_lib.human.human import applyMMMRotationToURDFJoint
 
 class Human(Obstacle):
     """
     Implements a movable human as an obstacle as coded by Kolja and Kai.
+    The model is either "full", the articulated mesh URDF, or "proxy", a handful of capsules driven by the same gait
+    cycle, which is a lot faster to render and collide with.
+    Built humans are pooled per process, humans released at the end of an episode are reused by the next build with
+    the same model and scale, as long as the PyBullet simulation was not reset in between (see the gym env's
+    reuse_bodies setting).
     """
 
-    def __init__(self, position: Union[list, np.ndarray], rotation: Union[list, np.ndarray], trajectory: list, sim_step: float, scale: float=1):
+    # free Man instances, keyed by model, scale and whether they are static
+    _pool = {}
+    # body ids of all humans built since the last invalidation
+    _bodies = set()
+
+    @classmethod
+    def invalidate_pool(cls):
+        """
+        Forgets all pooled humans, to be called after the PyBullet simulation was reset.
+        """
+        cls._pool = {}
+        cls._bodies = set()
+
+    @classmethod
+    def prune(cls) -> set:
+        """
+        Forgets all humans that are not pooled, to be called when the simulation is cleared around the pooled ones.
+        Returns the body ids of the pooled humans.
+        """
+        cls._bodies = {man.body_id for mans in cls._pool.values() for man in mans}
+        return set(cls._bodies)
+
+    def __init__(self, position: Union[list, np.ndarray], rotation: Union[list, np.ndarray], trajectory: list, sim_step: float, scale: float=1, model: str="full"):
         super().__init__(position, rotation, trajectory, 0)
         self.human = None
         self.scale = scale
+        if model not in ["full", "proxy"]:
+            raise ValueError(f"Unknown human model {model}, must be either full or proxy")
+        self.model = model
 
         self.sim_step = sim_step
         self.trajectory_idx = 0
@@ -25,14 +55,43 @@ class Human(Obstacle):
         self.closeness_threshold = 2  # very large, but necessary
 
     def build(self) -> int:
-        self.human = Man(0, partitioned=False, timestep=self.sim_step, scaling=self.scale, static=(len(self.trajectory)==0))
+        free = Human._pool.get((self.model, self.scale, len(self.trajectory) == 0))
+        if free:
+            self.human = free.pop()
+            self.human.resetPose()
+        elif self.model == "proxy":
+            self.human = ProxyMan(0, timestep=self.sim_step, scaling=self.scale, static=(len(self.trajectory)==0))
+        else:
+            self.human = Man(0, partitioned=False, timestep=self.sim_step, scaling=self.scale, static=(len(self.trajectory)==0))
+        Human._bodies.add(self.human.body_id)
         self.human.resetGlobalTransformation(self.position_orig, pyb.getEulerFromQuaternion(self.rotation_orig.tolist()))
         self.object_id = self.human.body_id
         return self.human.body_id
 
-    def move(self):
+    def release(self):
+        if self.human is None:
+            return
+        if self.human.body_id not in Human._bodies:
+            # built before the last invalidation, the body doesn't exist anymore
+            self.human = None
+            return
+        # park the body far away from the workspace until it is reused
+        pyb.resetBasePositionAndOrientation(self.human.body_id, [0, 0, -100], [0, 0, 0, 1])
+        Human._pool.setdefault((self.model, self.scale, len(self.trajectory) == 0), []).append(self.human)
+        self.human = None
+
+    def reset_motion(self):
+        self.position = np.array(self.position_orig)
+        self.trajectory_idx = 0
+        self.hand_raise_iterator = 0
+        self.hand_raise_direction = 1
+        # this also puts the gait and the hands back into their starting pose
+        self.human.resetPose()
+        self.human.resetGlobalTransformation(self.position_orig, pyb.getEulerFromQuaternion(self.rotation_orig.tolist()))
+
+    def move(self) -> bool:
         if not self.trajectory:
-            pass  # empty trajectory, do nothing
+            return False  # empty trajectory, do nothing
         elif len(self.trajectory) == 1:
             raise Exception("Human trajectories need to be either empty or at least two elements")
         else:  # looping trajectory
@@ -54,6 +113,7 @@ class Human(Obstacle):
                 self.human.resetGlobalTransformation([0, 0, 0], [0, 0, 0])
             last_target = self.trajectory[self.trajectory_idx -1] if self.trajectory_idx > 0 else self.trajectory[len(self.trajectory) - 1]
             self.human.advance(last_target, quat)
+            return True
 
 
     def raise_hands(self):
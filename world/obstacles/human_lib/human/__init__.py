@@ -3,12 +3,12 @@
 This module implements walkers.
 """
 
-__all__ = ['Human', 'Man', 'Child']
+__all__ = ['Human', 'Man', 'ProxyMan', 'Child']
 __version__ = '0.1'
 __author__ = 'Vaibhav Gupta'
 
 
 # Exports
 from .human import Human
-from .man import Man
+from .man import Man, ProxyMan
 from .child import Child
@@ -31,7 +31,7 @@ def generateQuaternionFromMMMRxRyRz(rx, ry, rz):
     return q
 
 
-def applyMMMRotationToURDFJoint(urdf_body_id, joint_index, rx, ry, rz, inverse=False):
+def generateURDFJointQuaternionFromMMMRxRyRz(rx, ry, rz, inverse=False):
     q = generateQuaternionFromMMMRxRyRz(rx, ry, rz)
     quat_tf_urdf = p.getQuaternionFromEuler([-math.pi/2, math.pi, 0])
     translation, quat_tf_urdf_inv = p.invertTransform([0, 0, 0], quat_tf_urdf)
@@ -40,10 +40,65 @@ def applyMMMRotationToURDFJoint(urdf_body_id, joint_index, rx, ry, rz, inverse=F
 
     if inverse:
         _, q = p.invertTransform([0, 0, 0], q)
+    return q
+
 
+def applyMMMRotationToURDFJoint(urdf_body_id, joint_index, rx, ry, rz, inverse=False):
+    q = generateURDFJointQuaternionFromMMMRxRyRz(rx, ry, rz, inverse)
     p.resetJointStateMultiDof(urdf_body_id, joint_index, q)
 
 
+# how the URDF joints are driven by the MMM joint positions
+# spherical joints: URDF joint index, MMM indices of rx, ry and rz (None for zero), whether the rotation is inverted
+SPHERICAL_JOINTS = [
+    (0, (6, 7, 8), True),       # chest to belly
+    (1, (3, 4, 5), True),       # belly to pelvis
+    (2, (33, 34, 35), False),   # pelvis to right leg
+    (3, (17, 18, 19), False),   # pelvis to left leg
+    (6, (28, 29, 30), False),   # right shin to right foot
+    (7, (12, 13, 14), False),   # left shin to left foot
+    (8, (37, 38, 39), False),   # chest to right arm
+    (9, (21, 22, 23), False),   # chest to left arm
+    (12, (40, 41, None), False),  # right forearm to right hand
+    (13, (24, 25, None), False),  # left forearm to left hand
+    (14, (0, 1, 2), False),     # chest to neck
+    (15, (9, 10, 11), False),   # neck to head
+]
+# revolute joints: URDF joint index, MMM index, sign
+REVOLUTE_JOINTS = [
+    (4, 36, -1),    # right leg to right shin
+    (5, 20, -1),    # left leg to left shin
+    (10, 31, -1),   # right arm to right forearm
+    (11, 15, -1),   # left arm to left forearm
+    (16, 43, 1),    # right foot to right sole
+    (17, 27, 1),    # left foot to left sole
+    (18, 42, -1),   # right sole to right toes
+    (19, 26, -1),   # left sole to left toes
+]
+
+
+# gait data of each human folder, loaded once per process and memory-mapped such that forked workers share the pages
+GAIT_FILES = [
+    "cyclic_joint_positions",
+    "cyclic_pelvis_rotations",
+    "cyclic_pelvis_forward_velocity",
+    "cyclic_pelvis_lateral_position",
+    "cyclic_pelvis_vertical_position",
+    "cycle_time_steps",
+]
+_gait_data = {}
+# compiled gait tables, keyed by folder, scaling and number of joints
+_compiled_gaits = {}
+
+
+def loadGaitData(folder):
+    if folder not in _gait_data:
+        _gait_data[folder] = {
+            name: np.load(os.path.join(folder, "walk", name + ".npy"), mmap_mode="r") for name in GAIT_FILES
+        }
+    return _gait_data[folder]
+
+
 class Human:
     """Base Class for Human"""
     gait_phase_step = 0
@@ -70,38 +125,17 @@ class Human:
         self.other_rpy = np.zeros(3)
         self.joint_positions = np.zeros(44)
 
-        # gait motion data
-        self.cyclic_joint_positions = np.load(os.path.join(
-            folder,
-            "walk",
-            "cyclic_joint_positions.npy"
-        ))
-        self.cyclic_pelvis_rotations = np.load(os.path.join(
-            folder,
-            "walk",
-            "cyclic_pelvis_rotations.npy"
-        ))
-        self.cyclic_pelvis_forward_velocity = scaling * translation_scaling * np.load(os.path.join(
-            folder,
-            "walk",
-            "cyclic_pelvis_forward_velocity.npy"
-        ))
-        self.cyclic_pelvis_lateral_position = scaling * translation_scaling * np.load(os.path.join(
-            folder,
-            "walk",
-            "cyclic_pelvis_lateral_position.npy"
-        ))
-        self.cyclic_pelvis_vertical_position = scaling * translation_scaling * np.load(os.path.join(
-            folder,
-            "walk",
-            "cyclic_pelvis_vertical_position.npy"
-        ))
-        self.cycle_time_steps = np.load(os.path.join(
-            folder,
-            "walk",
-            "cycle_time_steps.npy"
-        ))
-
+        # gait motion data, shared by all humans of the process
+        self.folder = folder
+        gait = loadGaitData(folder)
+        self.cyclic_joint_positions = gait["cyclic_joint_positions"]
+        self.cyclic_pelvis_rotations = gait["cyclic_pelvis_rotations"]
+        self.cyclic_pelvis_forward_velocity = scaling * translation_scaling * gait["cyclic_pelvis_forward_velocity"]
+        self.cyclic_pelvis_lateral_position = scaling * translation_scaling * gait["cyclic_pelvis_lateral_position"]
+        self.cyclic_pelvis_vertical_position = scaling * translation_scaling * gait["cyclic_pelvis_vertical_position"]
+        self.cycle_time_steps = gait["cycle_time_steps"]
+
+        self.__compile_gait()
         self.resetGlobalTransformation()
 
     def setColor(self):
@@ -153,6 +187,7 @@ class Human:
                                   gait_phase_value=0):
         self.initial_xyz = np.array(xyz)
         self.initial_rpy = np.array(rpy) + np.array([0, 0, -np.pi/2])
+        self.initial_quaternion = p.getQuaternionFromEuler(self.initial_rpy)
         self.other_xyz[0] = 0.0
         self.setGaitPhase(gait_phase_value)
 
@@ -189,6 +224,14 @@ class Human:
 
         self.__apply_pose()
 
+    def resetPose(self):
+        """
+        Brings a human that was used before back into the state of a freshly loaded one, apart from its placement.
+        """
+        self.is_fixed = False
+        self.global_xyz = np.zeros(3)
+        self.global_quaternion = p.getQuaternionFromEuler(np.zeros(3))
+
     def fix(self):
         self.is_fixed = True
 
@@ -273,118 +316,66 @@ class Human:
             joint_position_list.append(joint_state[0])
         return joint_position_list
 
+    def __compile_gait(self):
+        """
+        Precomputes the whole gait cycle: the joint targets, the base orientation and the offset between the base and
+        the center of the hips for every phase, such that applying a pose is one lookup and one batched joint reset.
+        The tables are shared by all humans of the process with the same folder, scaling and number of joints, models
+        with fewer joints than the URDF man (e.g. the capsule proxy) only get targets for the joints they have.
+        """
+        num_joints = p.getNumJoints(self.body_id)
+        key = (self.folder, self.scaling, num_joints)
+        if key in _compiled_gaits:
+            self.gait_joint_indices, self.gait_joint_targets, self.gait_base_orientations, self.gait_base_offsets = _compiled_gaits[key]
+            return
+
+        self.gait_joint_indices = list(range(min(len(SPHERICAL_JOINTS) + len(REVOLUTE_JOINTS), num_joints)))
+        self.gait_joint_targets = []
+        self.gait_base_orientations = []
+        self.gait_base_offsets = []
+        for phase in range(np.size(self.cycle_time_steps)):
+            joint_positions = self.cyclic_joint_positions[:, phase]
+            targets = [None] * len(self.gait_joint_indices)
+            for joint_index, (ix, iy, iz), inverse in SPHERICAL_JOINTS:
+                if joint_index >= num_joints:
+                    continue
+                rz = 0.0 if iz is None else joint_positions[iz]
+                targets[joint_index] = list(generateURDFJointQuaternionFromMMMRxRyRz(joint_positions[ix], joint_positions[iy], rz, inverse))
+            for joint_index, idx, sign in REVOLUTE_JOINTS:
+                if joint_index >= num_joints:
+                    continue
+                targets[joint_index] = [sign * joint_positions[idx]]
+            self.gait_joint_targets.append(targets)
+
+            # the base pose only depends on the joints and the pelvis rotation, so it can be probed with the body
+            p.resetJointStatesMultiDof(self.body_id, self.gait_joint_indices, targetValues=targets)
+            rx, ry, rz = self.cyclic_pelvis_rotations[:, phase]
+            self.gait_base_orientations.append(self.__applyMMMRotationAndZeroTranslationToURDFBody(rx, ry, rz))
+            self.gait_base_offsets.append(self.__getBaseToHipCenterOffset())
+        self.gait_base_offsets = np.array(self.gait_base_offsets)
+        _compiled_gaits[key] = (self.gait_joint_indices, self.gait_joint_targets, self.gait_base_orientations, self.gait_base_offsets)
+
     def __apply_pose(self):
-        # chest to belly
-        applyMMMRotationToURDFJoint(self.body_id, 0,
-                                    self.joint_positions[6],
-                                    self.joint_positions[7],
-                                    self.joint_positions[8],
-                                    inverse=True)
-
-        # belly to pelvis
-        applyMMMRotationToURDFJoint(self.body_id, 1,
-                                    self.joint_positions[3],
-                                    self.joint_positions[4],
-                                    self.joint_positions[5],
-                                    inverse=True)
-
-        # pelvis to right leg
-        applyMMMRotationToURDFJoint(self.body_id, 2,
-                                    self.joint_positions[33],
-                                    self.joint_positions[34],
-                                    self.joint_positions[35])
-
-        # pelvis to left leg
-        applyMMMRotationToURDFJoint(self.body_id, 3,
-                                    self.joint_positions[17],
-                                    self.joint_positions[18],
-                                    self.joint_positions[19])
-
-        # right leg to right shin
-        p.resetJointState(self.body_id, 4, -self.joint_positions[36])
-
-        # left leg to left shin
-        p.resetJointState(self.body_id, 5, -self.joint_positions[20])
-
-        # right shin to right foot
-        applyMMMRotationToURDFJoint(self.body_id, 6,
-                                    self.joint_positions[28],
-                                    self.joint_positions[29],
-                                    self.joint_positions[30])
-
-        # left shin to left foot
-        applyMMMRotationToURDFJoint(self.body_id, 7,
-                                    self.joint_positions[12],
-                                    self.joint_positions[13],
-                                    self.joint_positions[14])
-
-        # chest_to_right_arm
-        applyMMMRotationToURDFJoint(self.body_id, 8,
-                                    self.joint_positions[37],
-                                    self.joint_positions[38],
-                                    self.joint_positions[39])
-
-        # chest_to_left_arm
-        applyMMMRotationToURDFJoint(self.body_id, 9,
-                                    self.joint_positions[21],
-                                    self.joint_positions[22],
-                                    self.joint_positions[23])
-
-        # right arm to right forearm
-        p.resetJointState(self.body_id, 10, -self.joint_positions[31])
-
-        # left arm to left forearm
-        p.resetJointState(self.body_id, 11, -self.joint_positions[15])
-
-        # right_forearm_to_right_hand
-        applyMMMRotationToURDFJoint(self.body_id, 12,
-                                    self.joint_positions[40],
-                                    self.joint_positions[41],
-                                    0.0)
-
-        # left_forearm_to_left_hand
-        applyMMMRotationToURDFJoint(self.body_id, 13,
-                                    self.joint_positions[24],
-                                    self.joint_positions[25],
-                                    0.0)
-
-        # chest_to_neck
-        applyMMMRotationToURDFJoint(self.body_id, 14,
-                                    self.joint_positions[0],
-                                    self.joint_positions[1],
-                                    self.joint_positions[2])
-
-        # neck_to_head
-        applyMMMRotationToURDFJoint(self.body_id, 15,
-                                    self.joint_positions[9],
-                                    self.joint_positions[10],
-                                    self.joint_positions[11])
-
-        # right foot to right sole
-        p.resetJointState(self.body_id, 16, self.joint_positions[43])
-
-        # left foot to left sole
-        p.resetJointState(self.body_id, 17, self.joint_positions[27])
-
-        # right sole to right toes
-        p.resetJointState(self.body_id, 18, -self.joint_positions[42])
-
-        # left sole to left toes
-        p.resetJointState(self.body_id, 19, -self.joint_positions[26])
-
-        # Base rotation and Zero Translation (for now)
-        self.__applyMMMRotationAndZeroTranslationToURDFBody(
-            self.other_rpy[0],
-            self.other_rpy[1],
-            self.other_rpy[2]
-        )
+        # joints
+        p.resetJointStatesMultiDof(self.body_id, self.gait_joint_indices, targetValues=self.gait_joint_targets[self.gait_phase_step])
+
+        # base rotation and translation
+        t_base_com = self.other_xyz + self.gait_base_offsets[self.gait_phase_step]
 
-        # Base translation
-        self.__applyMMMTranslationToURDFBody(
-            self.other_xyz[0],
-            self.other_xyz[1],
-            self.other_xyz[2]
+        # pre-multiply with global transform
+        t_global, r_global = p.multiplyTransforms(
+            self.global_xyz,
+            self.global_quaternion,
+            self.initial_xyz,
+            self.initial_quaternion,
         )
+        t_final, r_final = p.multiplyTransforms(
+            t_global,
+            r_global,
+            t_base_com,
+            self.gait_base_orientations[self.gait_phase_step],
+        )
+        p.resetBasePositionAndOrientation(self.body_id, t_final, r_final)
 
     def __applyMMMRotationAndZeroTranslationToURDFBody(self, rx, ry, rz):
         # call this function AFTER applying the BT- and BP-joint angles for the urdf (as shown above)
@@ -433,8 +424,10 @@ class Human:
 
         # apply it to the base together with a zero translation
         p.resetBasePositionAndOrientation(self.body_id, [100, 100, 100], r_world_to_chest)
+        return r_world_to_chest
 
-    def __applyMMMTranslationToURDFBody(self, tx, ty, tz):
+    def __getBaseToHipCenterOffset(self):
+        # call this function AFTER applying the base rotation (as shown above)
 
         # get the translation to the left leg frame
         tllcom, rllcom, tlllcom, rlllcom, translation_to_left_leg_frame, rllf, vll, omegall = p.getLinkState(
@@ -452,25 +445,4 @@ class Human:
         for i in range(3):
             t_phb_center_to_base_com[i] = t_base_com[i] - 0.5*(
                 translation_to_right_leg_frame[i] + translation_to_left_leg_frame[i])
-
-        t_base_com = [
-            tx + t_phb_center_to_base_com[0],
-            ty + t_phb_center_to_base_com[1],
-            tz + t_phb_center_to_base_com[2]]
-
-        # pre-multiply with global transform
-        t_global, r_global = p.multiplyTransforms(
-            self.global_xyz,
-            self.global_quaternion,
-            self.initial_xyz,
-            p.getQuaternionFromEuler(self.initial_rpy),
-        )
-        t_final, r_final = p.multiplyTransforms(
-            t_global,
-            r_global,
-            t_base_com,
-            r_base_com,
-        )
-
-        # apply it to the base together with a zero translation
-        p.resetBasePositionAndOrientation(self.body_id, t_final, r_final)
+        return t_phb_center_to_base_com
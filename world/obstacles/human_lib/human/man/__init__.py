@@ -3,8 +3,8 @@
 This module implements man walkers.
 """
 
-__all__ = ['Man']
+__all__ = ['Man', 'ProxyMan']
 __version__ = '0.1'
 __author__ = 'Vaibhav Gupta'
 
-from .man import Man
+from .man import Man, ProxyMan
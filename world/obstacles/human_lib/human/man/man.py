@@ -42,3 +42,37 @@ class Man(Human):
             scaling=scaling,
             translation_scaling=0.95,   # this is a calibration/scaling of the mocap velocities
         )
+
+
+class ProxyMan(Human):
+    """
+    Cheap stand-in for Man made of a handful of capsules, see man_proxy.urdf. It shares the joints, gait data and
+    joint indices with Man, such that it walks and raises its hands the same way, but renders and collides a lot
+    faster.
+    """
+
+    def __init__(self,
+                 pybtPhysicsClient,
+                 timestep=0.01,
+                 scaling=1.0,
+                 static=False):
+        self.body_id = p.loadURDF(
+            os.path.join(os.path.dirname(__file__),
+                         "man_proxy.urdf"),
+            flags=p.URDF_MAINTAIN_LINK_ORDER,
+            physicsClientId=pybtPhysicsClient,
+            globalScaling=scaling,
+            useFixedBase=static
+        )
+
+        super().__init__(
+            pybtPhysicsClient,
+            folder=os.path.dirname(__file__),
+            timestep=timestep,
+            scaling=scaling,
+            translation_scaling=0.95,   # this is a calibration/scaling of the mocap velocities
+        )
+
+    def setColor(self):
+        # the colors are part of the URDF
+        pass
@@ -10,6 +10,7 @@ from typing import Union
 
 from world.obstacles.urdf_object import URDFObject
 from ..helpers.urdf_wall_generator import UrdfWallGenerator
+from ..helpers.urdf_cache import write_temporary_urdf
 
 class MazeObstacle(URDFObject):
 
@@ -17,6 +18,12 @@ class MazeObstacle(URDFObject):
         self.params = params
         super().__init__(position, rotation, trajectory, move_step, self.generate(), scale)
 
+    def build(self) -> int:
+        super().build()
+        if os.path.exists(self.urdf_path):
+            os.remove(self.urdf_path)
+        return self.object_id
+
     def has_el_prev_row(self, grid, row_idx, cell_idx):
         return row_idx > 0 and grid[row_idx - 1][cell_idx] == 1
 
@@ -74,11 +81,8 @@ class MazeObstacle(URDFObject):
                     urdf.add_wall(wall_thickness, wall_size, element_depth, curr_x, curr_y + (element_size / 2), element_depth / 2)
 
 
-        file_name = os.path.join(os.path.dirname(__file__), "maze.urdf")
-
-        f = open(file_name, "w")
-        f.write(urdf.get_urdf())
-        f.close()
+        # mazes are random, so each one gets a file of its own that is removed again once it has been loaded
+        file_name = write_temporary_urdf("maze", urdf.get_urdf(self.params.get("fidelity", "links")))
 
         self.solution = m.solutions[0]
 
@@ -0,0 +1,74 @@
+import numpy as np
+import pybullet as pyb
+from numpy import newaxis as na
+from world.obstacles.obstacle import Obstacle
+
+class ObstacleMotionManager:
+    """
+    Moves the obstacles of a world along their trajectories in one vectorized update instead of one move call per
+    obstacle. Positions, waypoints, waypoint indices and velocities of all obstacles are kept in arrays, only the
+    obstacles that actually moved get their pose reset in PyBullet.
+    Obstacles that implement their own movement (e.g. humans) are moved by calling their move method.
+    """
+
+    def __init__(self):
+        self.obstacles = []
+        self.custom_obstacles = []
+        # ids of the obstacles that moved in the last update
+        self.moved_ids = []
+
+    def set_obstacles(self, obstacles: list):
+        """
+        Takes over the movement of the given (already built) obstacles, replacing the previous ones.
+        """
+        self.obstacles = [obstacle for obstacle in obstacles if type(obstacle).move is Obstacle.move]
+        self.custom_obstacles = [obstacle for obstacle in obstacles if type(obstacle).move is not Obstacle.move]
+        self.moved_ids = []
+
+        n = len(self.obstacles)
+        self.object_ids = np.array([obstacle.object_id for obstacle in self.obstacles], dtype=int)
+        self.positions = np.array([obstacle.position for obstacle in self.obstacles], dtype=np.float64).reshape(n, 3)
+        self.move_steps = np.array([float(np.squeeze(obstacle.move_step)) for obstacle in self.obstacles], dtype=np.float64)
+        self.closeness_thresholds = np.array([obstacle.closeness_threshold for obstacle in self.obstacles], dtype=np.float64)
+
+        # waypoints padded to the longest trajectory
+        self.trajectory_lengths = np.array([len(obstacle.trajectory) for obstacle in self.obstacles], dtype=int)
+        self.waypoints = np.zeros((n, max(self.trajectory_lengths, default=0), 3), dtype=np.float64)
+        for idx, obstacle in enumerate(self.obstacles):
+            if obstacle.trajectory:
+                self.waypoints[idx, :len(obstacle.trajectory)] = obstacle.trajectory
+        # index of the waypoint each obstacle is moving towards
+        self.waypoint_idx = np.array([obstacle.trajectory_idx + 1 if len(obstacle.trajectory) > 1 else 0 for obstacle in self.obstacles], dtype=int)
+        # obstacles with one waypoint stop for good once they reached it, obstacles without waypoints never move
+        self.active = self.trajectory_lengths > 0
+        self.looping = self.trajectory_lengths > 1
+
+    def update(self) -> list:
+        """
+        Advances all obstacles by one step. Returns the ids of the obstacles that moved.
+        """
+        self.moved_ids = [obstacle.object_id for obstacle in self.custom_obstacles if obstacle.move()]
+        if not np.any(self.active):
+            return self.moved_ids
+
+        goals = self.waypoints[np.arange(len(self.obstacles)), self.waypoint_idx]
+        diff = goals - self.positions
+        diff_norm = np.linalg.norm(diff, axis=1)
+        reached = self.active & (diff_norm <= self.closeness_thresholds)
+        moving = self.active & ~reached
+
+        # obstacles that reached their waypoint loop on to the next one or stop in this step
+        self.waypoint_idx = np.where(reached & self.looping, (self.waypoint_idx + 1) % np.maximum(self.trajectory_lengths, 1), self.waypoint_idx)
+        self.active &= ~(reached & ~self.looping)
+
+        # constant velocity without jumping over the waypoint
+        move_step = np.minimum(self.move_steps, diff_norm)
+        step = diff * (move_step / np.where(moving, diff_norm, 1))[:, na]
+        self.positions[moving] += step[moving]
+
+        for idx in np.flatnonzero(moving):
+            obstacle = self.obstacles[idx]
+            obstacle.position = self.positions[idx].copy()
+            pyb.resetBasePositionAndOrientation(obstacle.object_id, obstacle.position, obstacle.rotation)
+            self.moved_ids.append(obstacle.object_id)
+        return self.moved_ids
@@ -21,6 +21,7 @@ class Obstacle(ABC):
         # if this has one element, the obstalce will move towards it and stay there
         # for two or more elements the obstacle will loop between the two or more points
         self.trajectory = [np.array(ele) for ele in trajectory]
+        self.trajectory_orig = [np.array(ele) for ele in trajectory]
         self.move_step = move_step
         self.trajectory_idx = -1
         self.closeness_threshold = 1e-3  # to determine if two positions are the same
@@ -34,9 +35,28 @@ class Obstacle(ABC):
         """
         return 0
 
-    def move(self):
+    def release(self):
+        """
+        Called when the world discards the obstacle at the end of an episode, allows handing its PyBullet body back for
+        reuse (see ShapeCache).
+        """
+        pass
+
+    def reset_motion(self):
+        """
+        Puts the already built obstacle back to the start of its trajectory, used when the world keeps its bodies for
+        the next episode (see World.reset_episode).
+        """
+        self.position = np.array(self.position_orig)
+        self.rotation = np.array(self.rotation_orig)
+        self.trajectory = [np.array(ele) for ele in self.trajectory_orig]
+        self.trajectory_idx = -1
+        pyb.resetBasePositionAndOrientation(self.object_id, self.position, self.rotation)
+
+    def move(self) -> bool:
         """
         Moves the obstacle along the trajectory with constant velocity.
+        Returns whether the obstacle actually changed its position.
         """
         if not self.trajectory:
             pass  # empty trajectory, do nothing
@@ -52,6 +72,7 @@ class Obstacle(ABC):
                 step = diff * (move_step / diff_norm)
                 self.position = self.position + step
                 pyb.resetBasePositionAndOrientation(self.object_id, self.position, self.rotation)
+                return True
         else:  # looping trajectory
             goal = self.trajectory[self.trajectory_idx + 1]
             diff = goal - self.position
@@ -66,4 +87,5 @@ class Obstacle(ABC):
                 step = diff * (move_step / diff_norm)  
                 self.position = self.position + step
                 pyb.resetBasePositionAndOrientation(self.object_id, self.position, self.rotation)
-
+                return True
+        return False
@@ -1,4 +1,5 @@
 from world.obstacles.obstacle import Obstacle
+from world.obstacles.shape_cache import ShapeCache
 import pybullet as pyb
 import numpy as np
 from typing import Union
@@ -12,12 +13,12 @@ class Sphere(Obstacle):
         self.color = color
 
     def build(self) -> int:
-        self.object_id = pyb.createMultiBody(baseMass=0,
-                                    baseVisualShapeIndex=pyb.createVisualShape(shapeType=pyb.GEOM_SPHERE, radius=self.radius, rgbaColor=self.color),
-                                    baseCollisionShapeIndex=pyb.createCollisionShape(shapeType=pyb.GEOM_SPHERE, radius=self.radius),
-                                    basePosition=self.position_orig)
+        self.object_id = ShapeCache.acquire_body(pyb.GEOM_SPHERE, [self.radius], self.color, self.position_orig)
         return self.object_id
 
+    def release(self):
+        ShapeCache.release_body(self.object_id)
+
 class Box(Obstacle):
 
     def __init__(self, position: Union[list, np.ndarray], rotation: Union[list, np.ndarray], trajectory: list, move_step: float, halfExtents: Union[list, np.ndarray], color=[0.5,0.5,0.5,1]) -> None:
@@ -27,9 +28,9 @@ class Box(Obstacle):
         self.halfExtents = halfExtents
 
     def build(self) -> int:
-        self.object_id = pyb.createMultiBody(baseMass=0,
-                                    baseVisualShapeIndex=pyb.createVisualShape(shapeType=pyb.GEOM_BOX, halfExtents=self.halfExtents, rgbaColor=self.color),
-                                    baseCollisionShapeIndex=pyb.createCollisionShape(shapeType=pyb.GEOM_BOX, halfExtents=self.halfExtents),
-                                    basePosition=self.position_orig)
+        self.object_id = ShapeCache.acquire_body(pyb.GEOM_BOX, self.halfExtents, self.color, self.position_orig)
+
+        return self.object_id
 
-        return self.object_id
\ No newline at end of file
+    def release(self):
+        ShapeCache.release_body(self.object_id)
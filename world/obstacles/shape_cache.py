@@ -0,0 +1,116 @@
+import pybullet as pyb
+
+class ShapeCache:
+    """
+    Process-wide cache of PyBullet shapes and pool of primitive multibodies.
+    Shapes are keyed by geometry, dimensions rounded to a quantum and color, such that obstacles of (almost) the same
+    size share their collision and visual shapes instead of creating new ones on every build.
+    Bodies released by a world are kept far away from the workspace and handed out again, teleported into place, to
+    obstacles with the same key.
+    All ids become invalid once the PyBullet simulation is reset, so invalidate has to be called after every
+    pyb.resetSimulation. Bodies (and shapes) are only reused if the gym env clears the simulation around the parked
+    bodies instead, see its reuse_bodies setting.
+    """
+
+    # meters that dimensions are rounded to
+    quantum = 0.005
+    # where released bodies wait for their reuse
+    parking_position = [0, 0, -100]
+
+    _visual_shapes = {}
+    _collision_shapes = {}
+    _free_bodies = {}
+    _body_keys = {}
+    # bodies released since the last prune
+    _released = set()
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Forgets all shapes and bodies, to be called after the PyBullet simulation was reset.
+        """
+        cls._visual_shapes = {}
+        cls._collision_shapes = {}
+        cls._free_bodies = {}
+        cls._body_keys = {}
+        cls._released = set()
+
+    @classmethod
+    def prune(cls) -> set:
+        """
+        Forgets all bodies that are not parked, to be called when the simulation is cleared around the parked ones.
+        Parked bodies that were not handed out again since the last prune are forgotten as well, otherwise bodies of
+        sizes that don't come up again (e.g. randomly sized obstacles) would pile up.
+        Returns the ids of the bodies that stay parked.
+        """
+        cls._free_bodies = {key: [body_id for body_id in bodies if body_id in cls._released] for key, bodies in cls._free_bodies.items()}
+        cls._free_bodies = {key: bodies for key, bodies in cls._free_bodies.items() if bodies}
+        parked = {body_id for bodies in cls._free_bodies.values() for body_id in bodies}
+        cls._body_keys = {body_id: key for body_id, key in cls._body_keys.items() if body_id in parked}
+        cls._released = set()
+        return parked
+
+    @classmethod
+    def quantize(cls, dimensions) -> list:
+        """
+        Rounds dimensions to the quantum, never below one quantum.
+        """
+        return [max(round(float(dimension) / cls.quantum), 1) * cls.quantum for dimension in dimensions]
+
+    @staticmethod
+    def _shape_args(geometry: int, dimensions: list) -> dict:
+        if geometry == pyb.GEOM_SPHERE:
+            return {"radius": dimensions[0]}
+        return {"halfExtents": dimensions}
+
+    @classmethod
+    def get_visual_shape(cls, geometry: int, dimensions: list, color: list) -> int:
+        """
+        Returns a visual shape of the given geometry (pyb.GEOM_BOX with half extents or pyb.GEOM_SPHERE with radius).
+        """
+        dimensions = cls.quantize(dimensions)
+        key = (geometry, tuple(dimensions), tuple(color))
+        if key not in cls._visual_shapes:
+            cls._visual_shapes[key] = pyb.createVisualShape(shapeType=geometry, rgbaColor=color, **cls._shape_args(geometry, dimensions))
+        return cls._visual_shapes[key]
+
+    @classmethod
+    def get_collision_shape(cls, geometry: int, dimensions: list) -> int:
+        """
+        Returns a collision shape of the given geometry, see get_visual_shape.
+        """
+        dimensions = cls.quantize(dimensions)
+        key = (geometry, tuple(dimensions))
+        if key not in cls._collision_shapes:
+            cls._collision_shapes[key] = pyb.createCollisionShape(shapeType=geometry, **cls._shape_args(geometry, dimensions))
+        return cls._collision_shapes[key]
+
+    @classmethod
+    def acquire_body(cls, geometry: int, dimensions: list, color: list, position) -> int:
+        """
+        Returns a static body with the given shape at the given position, reusing a released one if possible.
+        """
+        key = (geometry, tuple(cls.quantize(dimensions)), tuple(color))
+        free = cls._free_bodies.get(key)
+        if free:
+            body_id = free.pop()
+            pyb.resetBasePositionAndOrientation(body_id, position, [0, 0, 0, 1])
+        else:
+            body_id = pyb.createMultiBody(baseMass=0,
+                                          baseVisualShapeIndex=cls.get_visual_shape(geometry, dimensions, color),
+                                          baseCollisionShapeIndex=cls.get_collision_shape(geometry, dimensions),
+                                          basePosition=position)
+            cls._body_keys[body_id] = key
+        return body_id
+
+    @classmethod
+    def release_body(cls, body_id: int):
+        """
+        Parks a body acquired before for later reuse.
+        """
+        key = cls._body_keys.get(body_id)
+        if key is None:
+            return  # created before the last invalidation
+        pyb.resetBasePositionAndOrientation(body_id, cls.parking_position, [0, 0, 0, 1])
+        cls._free_bodies.setdefault(key, []).append(body_id)
+        cls._released.add(body_id)
@@ -8,6 +8,7 @@ from mazelib.generate.DungeonRooms import DungeonRooms
 from mazelib.solve.BacktrackingSolver import BacktrackingSolver
 from world.obstacles.urdf_object import URDFObject
 from ..helpers.urdf_wall_generator import UrdfWallGenerator
+from ..helpers.urdf_cache import get_cached_urdf
 from typing import Union
 
 class ShelfObstacle(URDFObject):
@@ -18,6 +19,10 @@ class ShelfObstacle(URDFObject):
         
 
     def generate(self):
+        # shelves are fully determined by their parameters, so each one is only generated and written once
+        return get_cached_urdf("shelf", self.params, self._generate_urdf, UrdfWallGenerator.VERSION)
+
+    def _generate_urdf(self):
         rows = self.params["rows"]
         columns = self.params["cols"]
         element_size = self.params["element_size"]
@@ -38,11 +43,6 @@ class ShelfObstacle(URDFObject):
                     urdf_wall_generator.add_wall(wall_thickness, element_size  + wall_offset, shelf_depth, wall_offset + (col_idx + 1) * element_size, wall_offset + xy_offset + row_idx * element_size, shelf_depth / 2)
                 if row_idx == rows - 1:
                     urdf_wall_generator.add_wall(element_size + wall_offset, wall_thickness, shelf_depth, wall_offset + xy_offset + col_idx * element_size, wall_offset + (row_idx + 1) * element_size, shelf_depth / 2)
-        
-        file_name = os.path.join(os.path.dirname(__file__), "shelf.urdf")
 
-        f = open(file_name, "w")
-        f.write(urdf_wall_generator.get_urdf())
-        f.close()
-        return file_name
+        return urdf_wall_generator.get_urdf(self.params.get("fidelity", "links"))
         
\ No newline at end of file
@@ -0,0 +1,157 @@
+import numpy as np
+
+__all__ = [
+    'ScenarioBank',
+]
+
+# obstacle geometries in the bank
+OBSTACLE_TYPES = ["box", "sphere"]
+
+class ScenarioBank:
+    """
+    Memory-mapped file of pre-generated episode specs, such that worlds don't have to sample their episodes while
+    building them and episodes can be replayed exactly.
+    The file is a .npy file with one record per episode. Specs are handed out in order, each worker only sees every
+    num_shards-th spec starting at its shard index.
+    A spec is a dict with the following keys:
+        targets: array (n_robots x 3), position targets of the robots
+        ee_starts: array (n_robots x 3), end effector starting positions, nan for robots starting in their resting pose
+        ee_start_rotations: array (n_robots x 4), end effector starting quaternions, nan if the rotation is not set
+        obstacles: list of dicts with the keys type ("box" or "sphere"), position, dims (half extents or [radius]),
+            color, move_step and trajectory (list of positions)
+    Use world/scenario_bank.py as a script to generate a bank for a config file.
+    """
+
+    def __init__(self, path: str, shard: int = 0, num_shards: int = 1, start_index: int = 0):
+        self.records = np.load(path, mmap_mode="r")
+        self.indices = range(shard, len(self.records), num_shards)
+        if not len(self.indices):
+            raise ValueError(f"scenario bank {path} has no specs for shard {shard} of {num_shards}")
+        # index of the next spec within this shard
+        self.position = start_index
+        # index of the last handed out spec within the whole file, useful for replaying it later
+        self.last_index = None
+
+    def __len__(self):
+        return len(self.indices)
+
+    def get(self, idx: int) -> dict:
+        """
+        Returns the spec with the given index within this shard.
+        """
+        self.last_index = self.indices[idx % len(self.indices)]
+        return self.record_to_spec(self.records[self.last_index])
+
+    def next(self) -> dict:
+        """
+        Returns the next spec of this shard, starting over at the end.
+        """
+        spec = self.get(self.position)
+        self.position += 1
+        return spec
+
+    @staticmethod
+    def record_dtype(num_robots: int, max_obstacles: int, max_trajectory_length: int) -> np.dtype:
+        return np.dtype([
+            ("targets", np.float64, (num_robots, 3)),
+            ("ee_starts", np.float64, (num_robots, 3)),
+            ("ee_start_rotations", np.float64, (num_robots, 4)),
+            ("num_obstacles", np.int32),
+            ("obstacle_types", np.int8, (max_obstacles,)),
+            ("obstacle_positions", np.float64, (max_obstacles, 3)),
+            ("obstacle_dims", np.float64, (max_obstacles, 3)),
+            ("obstacle_colors", np.float32, (max_obstacles, 4)),
+            ("obstacle_move_steps", np.float64, (max_obstacles,)),
+            ("trajectory_lengths", np.int32, (max_obstacles,)),
+            ("trajectories", np.float64, (max_obstacles, max_trajectory_length, 3)),
+        ])
+
+    @staticmethod
+    def spec_to_record(spec: dict, record: np.ndarray):
+        """
+        Writes a spec into a (zeroed) record of the bank.
+        """
+        record["targets"] = spec["targets"]
+        record["ee_starts"] = spec["ee_starts"]
+        record["ee_start_rotations"] = spec["ee_start_rotations"]
+        obstacles = spec["obstacles"]
+        if len(obstacles) > len(record["obstacle_types"]):
+            raise ValueError(f"spec has {len(obstacles)} obstacles, the bank only fits {len(record['obstacle_types'])}")
+        record["num_obstacles"] = len(obstacles)
+        for idx, obstacle in enumerate(obstacles):
+            trajectory = obstacle["trajectory"]
+            if len(trajectory) > record["trajectories"].shape[1]:
+                raise ValueError(f"spec has a trajectory of length {len(trajectory)}, the bank only fits {record['trajectories'].shape[1]}")
+            dims = np.ravel(obstacle["dims"])
+            record["obstacle_types"][idx] = OBSTACLE_TYPES.index(obstacle["type"])
+            record["obstacle_positions"][idx] = obstacle["position"]
+            record["obstacle_dims"][idx, :len(dims)] = dims
+            record["obstacle_colors"][idx] = obstacle["color"]
+            record["obstacle_move_steps"][idx] = obstacle["move_step"]
+            record["trajectory_lengths"][idx] = len(trajectory)
+            if trajectory:
+                record["trajectories"][idx, :len(trajectory)] = trajectory
+
+    @staticmethod
+    def record_to_spec(record: np.ndarray) -> dict:
+        obstacles = []
+        for idx in range(int(record["num_obstacles"])):
+            obstacle_type = OBSTACLE_TYPES[record["obstacle_types"][idx]]
+            obstacles.append({
+                "type": obstacle_type,
+                "position": np.array(record["obstacle_positions"][idx]),
+                "dims": np.array(record["obstacle_dims"][idx, :1 if obstacle_type == "sphere" else 3]).tolist(),
+                "color": np.array(record["obstacle_colors"][idx]).tolist(),
+                "move_step": float(record["obstacle_move_steps"][idx]),
+                "trajectory": list(np.array(record["trajectories"][idx, :record["trajectory_lengths"][idx]])),
+            })
+        return {
+            "targets": np.array(record["targets"]),
+            "ee_starts": np.array(record["ee_starts"]),
+            "ee_start_rotations": np.array(record["ee_start_rotations"]),
+            "obstacles": obstacles,
+        }
+
+    @classmethod
+    def write(cls, path: str, specs, num_specs: int, num_robots: int, max_obstacles: int, max_trajectory_length: int):
+        """
+        Writes num_specs specs taken from the given iterable into a new bank file.
+        """
+        records = np.lib.format.open_memmap(path, mode="w+", shape=(num_specs,),
+                                            dtype=cls.record_dtype(num_robots, max_obstacles, max_trajectory_length))
+        for idx, spec in zip(range(num_specs), specs):
+            cls.spec_to_record(spec, records[idx])
+            if idx % 10000 == 0:
+                records.flush()
+        records.flush()
+        del records
+
+
+def generate_specs(env_config: dict):
+    """
+    Yields validated specs forever, using the env to sample and build episodes until they are collision free.
+    """
+    from gym_env.environment import ModularDRLEnv
+    env_config = {**env_config, "max_episodes": -1, "logging": 0, "display": False, "display_extra": False}
+    env = ModularDRLEnv(env_config)
+    while True:
+        env.reset()
+        yield env.world.get_episode_spec()
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    from configs.configparser import parse_config
+
+    parser = ArgumentParser(description="Pre-generates episode specs for the world of a config file into a scenario bank.")
+    parser.add_argument("configfile", help="Path to the config yaml of the env.")
+    parser.add_argument("outfile", help="Path of the .npy file to write.")
+    parser.add_argument("--num_specs", type=int, default=100000)
+    parser.add_argument("--max_obstacles", type=int, default=16)
+    parser.add_argument("--max_trajectory_length", type=int, default=8)
+    args = parser.parse_args()
+
+    _, env_config = parse_config(args.configfile, True)
+    env_config["world"]["config"]["scenario_bank"] = None
+    ScenarioBank.write(args.outfile, generate_specs(env_config), args.num_specs, len(env_config["robots"]),
+                       args.max_obstacles, args.max_trajectory_length)
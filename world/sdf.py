@@ -0,0 +1,156 @@
+import numpy as np
+import pybullet as pyb
+from numpy import newaxis as na
+
+class SignedDistanceField:
+    """
+    Signed distance field of the obstacles of a world, negative inside of obstacles.
+    Obstacles are approximated by the AABBs of their links. Static obstacles are baked into a grid once per episode,
+    their distances and gradients are trilinear lookups in that grid. Obstacles that moved during the episode and the
+    table(s) are computed analytically from their current link AABBs, such that queries can leave out the table.
+    """
+
+    def __init__(self, world, resolution: float, margin: float = 0.1, table_ids: list = None):
+        self.world = world
+        # grid spacing in meters
+        self.resolution = resolution
+        # ids of objects that are kept out of the grid so that queries can ignore them
+        self.table_ids = set(table_ids) if table_ids is not None else set()
+
+        # grid nodes span the workspace boundaries plus a margin
+        self.grid_min = np.array([world.x_min, world.y_min, world.z_min], dtype=np.float32) - margin
+        grid_max = np.array([world.x_max, world.y_max, world.z_max], dtype=np.float32) + margin
+        self.grid_shape = tuple(np.ceil((grid_max - self.grid_min) / resolution).astype(int) + 1)
+        # length of the grid's diagonal, an upper bound for distances between points within the grid
+        self.extent = float(np.linalg.norm(grid_max - self.grid_min))
+        x, y, z = [self.grid_min[i] + resolution * np.arange(self.grid_shape[i]) for i in range(3)]
+        self.nodes = np.stack(np.meshgrid(x, y, z, indexing="ij"), axis=-1).reshape(-1, 3)
+
+        self.grid = None
+        self.static_ids = []
+        self.dynamic_ids = set()
+        self.last_world_update = 0
+
+    def build(self):
+        """
+        Bakes all obstacles that have not moved so far in this episode into the grid. Should be called once the world
+        has been built for a new episode.
+        """
+        self.dynamic_ids = set()
+        self.last_world_update = self.world.update_counter
+        self._bake()
+
+    def _bake(self):
+        self.static_ids = [object_id for object_id in self.world.objects_ids if object_id not in self.table_ids and object_id not in self.dynamic_ids]
+        grid = np.full(len(self.nodes), np.inf, dtype=np.float32)
+        # one box at a time to keep the memory bounded for fine grids
+        for box_min, box_max in zip(*self._link_aabbs(self.static_ids)):
+            grid = np.minimum(grid, self.box_distances(self.nodes, box_min[na, :], box_max[na, :], False)[:, 0])
+        self.grid = grid.reshape(self.grid_shape)
+
+    def _update_dynamic(self):
+        """
+        Moves obstacles that started moving out of the grid and into the analytic part, rebaking the grid if needed.
+        """
+        if self.world.update_counter == self.last_world_update:
+            return
+        started_moving = self.world.moved_since(self.last_world_update) - self.dynamic_ids - self.table_ids
+        self.last_world_update = self.world.update_counter
+        if started_moving:
+            self.dynamic_ids |= started_moving
+            self._bake()
+
+    @staticmethod
+    def _link_aabbs(object_ids):
+        """
+        Returns the AABB minima and maxima (each shape n x 3) of all links of the given objects.
+        """
+        mins, maxs = [], []
+        for object_id in object_ids:
+            for link in range(-1, pyb.getNumJoints(object_id)):
+                aabb_min, aabb_max = pyb.getAABB(object_id, link)
+                mins.append(aabb_min)
+                maxs.append(aabb_max)
+        return np.array(mins, dtype=np.float32).reshape(-1, 3), np.array(maxs, dtype=np.float32).reshape(-1, 3)
+
+    @staticmethod
+    def box_distances(points, box_min, box_max, with_gradients=True):
+        """
+        Signed distances (shape n x b) and optionally their gradients (shape n x b x 3) of n points to b axis aligned
+        boxes.
+        """
+        points = points[:, na, :]
+        center = (box_min + box_max) / 2
+        q = np.abs(points - center) - (box_max - box_min) / 2
+        outside = np.linalg.norm(np.maximum(q, 0), axis=2)
+        inside = np.minimum(q.max(axis=2), 0)
+        if not with_gradients:
+            return outside + inside
+
+        # outside the gradient points away from the closest point on the box, inside along the axis of the closest face
+        closest = np.clip(points, box_min, box_max)
+        gradients = (points - closest) / np.maximum(outside, 1e-9)[:, :, na]
+        face_gradients = np.sign(points - center) * (q == q.max(axis=2)[:, :, na])
+        gradients = np.where((outside > 0)[:, :, na], gradients, face_gradients)
+        return outside + inside, gradients
+
+    def _grid_lookup(self, points):
+        """
+        Trilinear interpolation of distance and gradient in the grid, points outside the grid are clamped onto it.
+        """
+        idx = (points - self.grid_min) / self.resolution
+        idx = np.clip(idx, 0, np.array(self.grid_shape) - 1.001)
+        i0 = np.floor(idx).astype(int)
+        t = idx - i0
+        x0, y0, z0 = i0.T
+        x1, y1, z1 = x0 + 1, y0 + 1, z0 + 1
+        tx, ty, tz = t.T
+
+        g = self.grid
+        c000, c100, c010, c110 = g[x0, y0, z0], g[x1, y0, z0], g[x0, y1, z0], g[x1, y1, z0]
+        c001, c101, c011, c111 = g[x0, y0, z1], g[x1, y0, z1], g[x0, y1, z1], g[x1, y1, z1]
+
+        # interpolate along x, then y, then z
+        c00 = c000 + tx * (c100 - c000)
+        c10 = c010 + tx * (c110 - c010)
+        c01 = c001 + tx * (c101 - c001)
+        c11 = c011 + tx * (c111 - c011)
+        c0 = c00 + ty * (c10 - c00)
+        c1 = c01 + ty * (c11 - c01)
+        distances = c0 + tz * (c1 - c0)
+
+        # partial derivatives of the trilinear interpolation
+        dx = ((1 - ty) * (1 - tz) * (c100 - c000) + ty * (1 - tz) * (c110 - c010)
+              + (1 - ty) * tz * (c101 - c001) + ty * tz * (c111 - c011))
+        dy = (1 - tz) * (c10 - c00) + tz * (c11 - c01)
+        dz = c1 - c0
+        gradients = np.stack([dx, dy, dz], axis=1) / self.resolution
+        return distances, gradients
+
+    def query(self, points, ignore_ids=()):
+        """
+        Returns the signed distances (shape n) of the given points (shape n x 3) to the closest obstacle and the
+        gradients (shape n x 3) of the distance field. Objects in ignore_ids have to be table or dynamic objects.
+        If there is no obstacle left to consider, the distances are inf and the gradients zero.
+        """
+        self._update_dynamic()
+        points = np.asarray(points, dtype=np.float32)
+        if self.static_ids:
+            distances, gradients = self._grid_lookup(points)
+        else:
+            distances, gradients = np.full(len(points), np.inf, dtype=np.float32), np.zeros((len(points), 3), dtype=np.float32)
+
+        analytic_ids = [object_id for object_id in self.dynamic_ids | self.table_ids if object_id not in ignore_ids]
+        box_min, box_max = self._link_aabbs(analytic_ids)
+        if len(box_min):
+            box_distances, box_gradients = self.box_distances(points, box_min, box_max)
+            closest_box = box_distances.argmin(axis=1)
+            box_distances = box_distances[np.arange(len(points)), closest_box]
+            box_gradients = box_gradients[np.arange(len(points)), closest_box]
+            use_box = box_distances < distances
+            distances = np.where(use_box, box_distances, distances)
+            gradients = np.where(use_box[:, na], box_gradients, gradients)
+
+        # normalize, trilinear gradients are shorter than one close to edges
+        gradients = gradients / np.maximum(np.linalg.norm(gradients, axis=1), 1e-9)[:, na]
+        return distances, gradients
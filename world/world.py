@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 import numpy as np
 import pybullet as pyb
+from world.sdf import SignedDistanceField
+from world.scenario_bank import ScenarioBank
+from world.obstacles.pybullet_shapes import Box, Sphere
 
 class World(ABC):
     """
@@ -8,6 +11,10 @@ class World(ABC):
     See the random obstacles world for examples.
     """
 
+    # whether all obstacles of this world that can be pooled hand their bodies back in reset (see Obstacle.release),
+    # the gym env then keeps the pooled bodies for the next episode by default, see its reuse_bodies setting
+    supports_body_reuse = False
+
     def __init__(self, world_config):
 
         # list that will contain all PyBullet object ids with collision managed by this world simulation
@@ -28,11 +35,46 @@ class World(ABC):
         # points for robot end effectors at episode start
         self.ee_starting_points = []
 
+        # obstacle objects (see world/obstacles) of the current episode, worlds using them should put them in here
+        self.obstacle_objects = []
+
+        # ids of the table(s) of the current scene, worlds with a table should set them in build
+        # goals and the distance field ignore the table for skeleton points that rest on it
+        self.table_ids = []
+
         # list of robots, gets filled by register method down below
         self.robots_in_world = []  # all robots in world
 
         # collision attribute, for convenient outside access
         self.collision = False
+        # id of the object a robot collided with, -1 if there was no collision
+        self.collided_object_id = -1
+
+        # bookkeeping of moving objects, allows sensors to only recompute data for objects that changed
+        # number of world updates so far, gets increased by the gym env before each update
+        self.update_counter = 0
+        # maps a PyBullet object id to the update counter value at which it moved for the last time
+        self.last_moved = {}
+
+        # optional signed distance field of the obstacles, rebuilt by the gym env once per episode
+        # grid spacing in meters, None disables the field
+        self.sdf_resolution = world_config.get("sdf_resolution", None)
+        # margin in meters by which the field extends beyond the workspace boundaries
+        self.sdf_margin = world_config.get("sdf_margin", 0.1)
+        # ids of the table(s) kept out of the grid, None to use the table_ids of the world
+        self.sdf_table_ids = world_config.get("sdf_table_ids", None)
+        self.sdf = None
+
+        # optional bank of pre-generated episodes, worlds supporting it build their episodes from its specs instead of
+        # sampling them, see world/scenario_bank.py
+        # path to the bank file, None to sample the episodes
+        self.scenario_bank = None
+        if world_config.get("scenario_bank", None) is not None:
+            # the gym env sets the worker index and count, each worker streams its own shard of the bank
+            self.scenario_bank = ScenarioBank(world_config["scenario_bank"], world_config.get("worker_id", 0),
+                                              world_config.get("num_workers", 1), world_config.get("scenario_start_index", 0))
+        # spec of the current episode if it comes from the bank
+        self.episode_spec = None
 
     def register_robots(self, robots):
         """
@@ -46,33 +88,121 @@ class World(ABC):
             robot.id = id_counter
             id_counter += 1
 
+    def mark_moved(self, object_id):
+        """
+        Notes that the object with the given id changed its pose (or joint states) in the current update.
+        Worlds should call this for every object in self.objects_ids they move in their update method.
+        """
+        self.last_moved[object_id] = self.update_counter
+
+    def moved_since(self, update_counter) -> set:
+        """
+        Returns the ids of all objects that moved after the update with the given counter value.
+        """
+        return {object_id for object_id, counter in self.last_moved.items() if counter > update_counter}
+
+    def build_sdf(self):
+        """
+        Builds the signed distance field for the obstacles of the current episode.
+        """
+        if self.sdf is None:
+            self.sdf = SignedDistanceField(self, self.sdf_resolution, self.sdf_margin)
+        # the ids of the table change whenever the scene is rebuilt
+        self.sdf.table_ids = set(self.sdf_table_ids if self.sdf_table_ids is not None else self.table_ids)
+        self.sdf.build()
+
+    def next_episode_spec(self):
+        """
+        Returns the spec for the next episode from the scenario bank or None if there is no bank.
+        Worlds supporting the bank should call this in their reset method.
+        """
+        if self.scenario_bank is None:
+            return None
+        return self.scenario_bank.next()
+
+    def get_episode_spec(self) -> dict:
+        """
+        Returns the spec of the current episode in the format of the scenario bank.
+        Only box and sphere obstacles in self.obstacle_objects are part of it, everything else should come from the config.
+        """
+        targets = np.full((len(self.robots_in_world), 3), np.nan)
+        ee_starts = np.full((len(self.robots_in_world), 3), np.nan)
+        ee_start_rotations = np.full((len(self.robots_in_world), 4), np.nan)
+        for idx, target in enumerate(self.position_targets):
+            if target is not None and len(target):
+                targets[idx] = target
+        for idx, (position, rotation) in enumerate(self.ee_starting_points):
+            if position is not None:
+                ee_starts[idx] = position
+            if rotation is not None:
+                ee_start_rotations[idx] = rotation
+
+        obstacles = []
+        for obstacle in self.obstacle_objects:
+            if isinstance(obstacle, Box):
+                obstacle_type, dims = "box", list(obstacle.halfExtents)
+            elif isinstance(obstacle, Sphere):
+                obstacle_type, dims = "sphere", [obstacle.radius]
+            else:
+                continue
+            obstacles.append({"type": obstacle_type, "position": obstacle.position_orig, "dims": dims,
+                              "color": obstacle.color, "move_step": float(np.squeeze(obstacle.move_step)),
+                              "trajectory": list(obstacle.trajectory)})
+        return {"targets": targets, "ee_starts": ee_starts, "ee_start_rotations": ee_start_rotations, "obstacles": obstacles}
+
+    def _get_ee_starting_points_from_spec(self) -> list:
+        """
+        Returns the end effector starting points of the current episode spec in the format of create_ee_starting_points.
+        """
+        ee_starting_points = []
+        for position, rotation in zip(self.episode_spec["ee_starts"], self.episode_spec["ee_start_rotations"]):
+            ee_starting_points.append((None if np.isnan(position).any() else position,
+                                       None if np.isnan(rotation).any() else rotation))
+        return ee_starting_points
+
+    def _get_position_targets_from_spec(self) -> list:
+        """
+        Returns the position targets of the current episode spec, empty lists for robots without a target.
+        """
+        return [[] if np.isnan(target).any() else target for target in self.episode_spec["targets"]]
+
+    def _build_obstacles_from_spec(self) -> list:
+        """
+        Builds the obstacles of the current episode spec, adds them to self.objects_ids and returns them.
+        """
+        obstacles = []
+        for spec in self.episode_spec["obstacles"]:
+            if spec["type"] == "sphere":
+                obstacle = Sphere(spec["position"], [0, 0, 0, 1], spec["trajectory"], spec["move_step"], spec["dims"][0], color=spec["color"])
+            else:
+                obstacle = Box(spec["position"], [0, 0, 0, 1], spec["trajectory"], spec["move_step"], spec["dims"], color=spec["color"])
+            self.objects_ids.append(obstacle.build())
+            obstacles.append(obstacle)
+        return obstacles
+
     def perform_collision_check(self):
         """
         Performs a collision check 
         1. between all robots and all obstacles in the world and
         2. between each robot
         
-        Stores the result in a class variable.
+        Stores the result in a class variable, together with the id of the object the robot collided with.
         """
         pyb.performCollisionDetection()
+        obstacles = set(self.objects_ids)
+        robot_ids = {robot.object_id for robot in self.robots_in_world}
         col = False
-        # check for each robot with every obstacle
+        self.collided_object_id = -1
+        # one query per robot for all of its contacts, these are then mapped back to obstacles and other robots
         for robot in self.robots_in_world:
-            for obj in self.objects_ids:
-                if len(pyb.getContactPoints(robot.object_id, obj)) > 0:
-                    col = True 
+            for contact in pyb.getContactPoints(bodyA=robot.object_id):
+                other_id = contact[2]
+                if other_id in obstacles or (other_id in robot_ids and other_id != robot.object_id):
+                    col = True
+                    self.collided_object_id = other_id
                     break
             if col:
                 break  # this is to immediately break out of the outer loop too once a collision has been found
-        # check for each robot with every other one
-        if not col:  # skip if another collision was already detected
-            for idx, robot in enumerate(self.robots_in_world[:-1]):
-                for other_robot in self.robots_in_world[idx+1:]:
-                    if len(pyb.getContactPoints(robot.object_id, other_robot.object_id)) > 0:
-                        col = True
-                        break
-                if col:
-                    break  # same as above
         self.collision = col
 
     @abstractmethod
@@ -95,6 +225,33 @@ class World(ABC):
         """
         pass
 
+    def episode_changes(self) -> set:
+        """
+        Returns which parts of the world change from one episode to the next, a subset of
+            "scene": the obstacles and other bodies of the world
+            "targets": the position and rotation targets
+            "starts": the end effector starting points
+        If the scene stays the same, the gym env can (see its incremental_reset setting) skip resetting the simulation
+        and call reset_episode instead of reset and build, keeping all bodies.
+        By default everything changes.
+        """
+        return {"scene", "targets", "starts"}
+
+    def reset_episode(self, success_rate):
+        """
+        Partial counterpart of reset for worlds whose scene stays the same (see episode_changes): all bodies are kept, only
+        everything that moved during the last episode is put back into its starting state.
+        By default this clears the targets and starting points and resets the obstacles in self.obstacle_objects to the
+        start of their trajectories.
+        """
+        self.position_targets = []
+        self.rotation_targets = []
+        self.ee_starting_points = []
+        for obstacle in self.obstacle_objects:
+            if obstacle.trajectory_orig:
+                obstacle.reset_motion()
+                self.mark_moved(obstacle.object_id)
+
     def build_visual_aux(self):
         """
         This method should add objects that are not necessary to the purpose of the world and useful only for visual quality.
@@ -110,6 +267,7 @@ class World(ABC):
     def update(self):
         """
         This method should update all dynamic and movable parts of the world simulation. If there are none it doesn't need to do anything at all.
+        Every object that is moved here should be reported via self.mark_moved.
         """
         pass
 
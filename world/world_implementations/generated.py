@@ -111,12 +111,13 @@ class GeneratedWorld(World):
         self.rotation_targets = []
         self.ee_starting_points = []
         for object in self.obstacle_objects:
-            del object
+            object.release()
         self.obstacle_objects = []
 
     def update(self):
         for obstacle in self.obstacle_objects:
-            obstacle.move()
+            if obstacle.move():
+                self.mark_moved(obstacle.object_id)
         
     def create_ee_starting_points(self):
         self.ee_starting_points.append([None])
@@ -15,6 +15,9 @@ class KukaShelfExperiment(World):
     Implements the experiment world designed for the Kuka KR16 with two shelves and humans walking.
     """
 
+    # the humans and obstacle boxes are pooled, everything else is rebuilt anyway
+    supports_body_reuse = True
+
     def __init__(self, world_config):
         super().__init__(world_config)
 
@@ -27,6 +30,8 @@ class KukaShelfExperiment(World):
         self.humans_rotations = [np.array(rotation) for rotation in world_config["humans_rotations"]]
         # trajectories of the humans as numpy arrays
         self.humans_trajectories = [[np.array(position) for position in trajectory] for trajectory in world_config["humans_trajectories"]]
+        # full URDF or capsule proxy, see Human obstacle
+        self.human_model = world_config.get("human_model", "full")
 
         # overrides for the target positions, useful for eval, a random one will be chosen
         self.target_pos_override = [np.array(position) for position in world_config["target_pos_override"]]
@@ -39,7 +44,11 @@ class KukaShelfExperiment(World):
             "cols": 5,
             "element_size": .5,
             "shelf_depth": .5,
-            "wall_thickness": .01
+            "wall_thickness": .01,
+            # geometry of the shelf walls, see UrdfWallGenerator, merged walls collide a lot faster than one link per wall
+            # but put the whole shelf into one link, which the distance field and the occupancy grid (both working on
+            # link AABBs) see as one solid box
+            "fidelity": world_config.get("shelf_fidelity", "links")
         }
 
         # keep track of objects
@@ -57,7 +66,7 @@ class KukaShelfExperiment(World):
         
         # build humas
         for position, rotation, trajectory in zip(self.humans_positions, self.humans_rotations, self.humans_trajectories):
-            human = Human(position, rotation, trajectory, self.sim_step)
+            human = Human(position, rotation, trajectory, self.sim_step, model=self.human_model)
             self.obstacle_objects.append(human)
             self.objects_ids.append(human.build())
 
@@ -67,12 +76,17 @@ class KukaShelfExperiment(World):
         self.rotation_targets = []
         self.ee_starting_points = []
         for object in self.obstacle_objects:
-            del object
+            object.release()
         self.obstacle_objects = []
     
+    def episode_changes(self) -> set:
+        # shelves and humans come from the config
+        return {"targets", "starts"}
+
     def update(self):
         for obstacle in self.obstacle_objects:
-            obstacle.move()
+            if obstacle.move():
+                self.mark_moved(obstacle.object_id)
 
     def create_ee_starting_points(self) -> list:
         if self.start_override:
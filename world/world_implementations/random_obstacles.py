@@ -1,5 +1,6 @@
 from world.world import World
 from world.obstacles.pybullet_shapes import Box, Sphere
+from world.obstacles.motion_manager import ObstacleMotionManager
 import numpy as np
 import pybullet as pyb
 from random import choice, shuffle
@@ -44,6 +45,7 @@ class RandomObstacleWorld(World):
         self.trajectory_length_min, self.trajectory_length_max = world_config["moving_obstacles_trajectory_length"]
 
         self.obstacle_objects = []  # list to access the obstacle python objects
+        self.motion_manager = ObstacleMotionManager()  # moves all obstacles in one vectorized update
 
 
     def build(self):
@@ -52,6 +54,12 @@ class RandomObstacleWorld(World):
         ground_plate = pyb.loadURDF("workspace/plane.urdf", [0, 0, -0.01])
         self.objects_ids.append(ground_plate)
 
+        # use the scenario bank if there is one
+        if self.episode_spec is not None:
+            self.obstacle_objects = self._build_obstacles_from_spec()
+            self.motion_manager.set_obstacles(self.obstacle_objects)
+            return
+
         # add the moving obstacles
         for i in range(self.num_moving_obstacles + self.num_static_obstacles):
             # pick a one of the robots' starting positions randomly to...
@@ -100,14 +108,17 @@ class RandomObstacleWorld(World):
                 self.obstacle_objects.append(sphere)
                 self.objects_ids.append(sphere.build())
 
+        self.motion_manager.set_obstacles(self.obstacle_objects)
+
     def reset(self, success_rate):
         self.objects_ids = []
         self.position_targets = []
         self.rotation_targets = []
         self.ee_starting_points = []
         for object in self.obstacle_objects:
-            del object
+            object.release()
         self.obstacle_objects = []
+        self.episode_spec = self.next_episode_spec()
         # the next three don't need to be reset, so commented out
         #self.robots_in_world = []
         #self.robots_with_position = []
@@ -115,10 +126,13 @@ class RandomObstacleWorld(World):
 
     def update(self):
 
-        for obstacle in self.obstacle_objects:
-            obstacle.move()
+        for object_id in self.motion_manager.update():
+            self.mark_moved(object_id)
         
     def create_ee_starting_points(self):
+        if self.episode_spec is not None:
+            self.ee_starting_points = self._get_ee_starting_points_from_spec()
+            return self.ee_starting_points
         for robot in self.robots_in_world:
             if robot.goal.needs_a_position:
                 rando = np.random.rand(3)
@@ -134,6 +148,9 @@ class RandomObstacleWorld(World):
         return self.ee_starting_points
 
     def create_position_target(self):
+        if self.episode_spec is not None:
+            self.position_targets = self._get_position_targets_from_spec()
+            return self.position_targets
         for idx, robot in enumerate(self.robots_in_world):
             if robot.goal.needs_a_position:
                 while True:
@@ -3,6 +3,7 @@ import numpy as np
 import pybullet as pyb
 from world.obstacles.human import Human
 from world.obstacles.pybullet_shapes import Box
+from world.obstacles.motion_manager import ObstacleMotionManager
 import pybullet_data as pyb_d
 from random import choice
 import sys
@@ -36,6 +37,9 @@ class TableExperiment(World):
     Implements the table experiment with humans and moving obstacles by Kolja and Kai.
     """
 
+    # the humans and obstacle boxes are pooled, everything else is rebuilt anyway
+    supports_body_reuse = True
+
     def __init__(self, world_config):
         super().__init__(world_config)
         # INFO: if multiple robot base positions are given, we will assume that the first one is the main one for the experiment
@@ -72,9 +76,12 @@ class TableExperiment(World):
         self.human_trajectories = [[np.array(ele) for ele in traj] for traj in world_config["human_trajectories"]]
         self.human_reactive = world_config["human_reactive"]  # list of bools that determines if the human in question will raise his arm if the robot gets near enough
         self.human_ee_was_near = [False for i in range(self.num_humans)]  # see update method
+        self.human_model = world_config.get("human_model", "full")  # full URDF or capsule proxy, see Human obstacle
         self.near_threshold = 0.5
 
         self.obstacle_objects = []
+        # moves all obstacles in one vectorized update
+        self.motion_manager = ObstacleMotionManager()
 
         # wether num obstacles will be overwritten automatically depending on env success rate, might be useful for training
         self.obstacle_training_schedule = world_config["obstacle_training_schedule"]
@@ -88,13 +95,18 @@ class TableExperiment(World):
         self.objects_ids.append(pyb.loadURDF("workspace/plane.urdf", [0, 0, -0.01]))
         # table
         self.objects_ids.append(pyb.loadURDF(pyb_d.getDataPath()+"/table/table.urdf", useFixedBase=True, globalScaling=1.75))
-        # humans
-        for i in range(self.num_humans):
-            with suppress_stdout():
-                human = Human(self.human_positions[i], self.human_rotations[i], self.human_trajectories[i], self.sim_step, 1.5)
+        self.table_ids = [self.objects_ids[-1]]
+        # humans, loading their URDFs prints a lot
+        with suppress_stdout():
+            for i in range(self.num_humans):
+                human = Human(self.human_positions[i], self.human_rotations[i], self.human_trajectories[i], self.sim_step, 1.5, self.human_model)
                 human.build()
-            self.humans.append(human)
+                self.humans.append(human)
         # obstacles
+        if self.episode_spec is not None:
+            self.obstacle_objects = self._build_obstacles_from_spec()
+            self.motion_manager.set_obstacles(self.obstacle_objects)
+            return
         extra = 0
 
         if self.experiment == 1:
@@ -166,18 +178,21 @@ class TableExperiment(World):
             obs = Box(position, [0, 0, 0, 1], trajectory, move_step, halfExtents, color=[1, 0, 0, 1])      
             self.objects_ids.append(obs.build())
             self.obstacle_objects.append(obs)    
+        self.motion_manager.set_obstacles(self.obstacle_objects)
 
     def reset(self, success_rate):
         self.objects_ids = []
+        self.table_ids = []
         self.position_targets = []
         self.rotation_targets = []
         self.ee_starting_points = []
         for human in self.humans:
-            del human
+            human.release()
         for obstacle in self.obstacle_objects:
-            del obstacle
+            obstacle.release()
         self.obstacle_objects = []
         self.humans = []
+        self.episode_spec = self.next_episode_spec()
 
         if self.obstacle_training_schedule:
             if success_rate < 0.2:
@@ -194,9 +209,25 @@ class TableExperiment(World):
             self.num_obstacles = min(8, self.num_obstacles)
             self.num_obstacles = max(0, self.num_obstacles)
 
+    def episode_changes(self) -> set:
+        # the table and the humans are always the same, random obstacles (or at least their sizes) are sampled anew
+        num_random_obstacles = self.num_obstacles - (2 if self.experiment == 1 else 0)
+        if self.scenario_bank is None and not self.obstacle_training_schedule and num_random_obstacles <= 0:
+            return {"targets", "starts"}
+        return super().episode_changes()
+
+    def reset_episode(self, success_rate):
+        super().reset_episode(success_rate)
+        for human in self.humans:
+            human.reset_motion()
+            self.mark_moved(human.object_id)
+        self.human_ee_was_near = [False for i in range(self.num_humans)]
+        self.motion_manager.set_obstacles(self.obstacle_objects)
+
     def update(self):
         for idx, human in enumerate(self.humans):
-            human.move()
+            if human.move():
+                self.mark_moved(human.object_id)
             if self.human_reactive[idx]:
                 near = False or self.human_ee_was_near[idx]
                 if not near:  # check if end effector is near
@@ -207,10 +238,15 @@ class TableExperiment(World):
                             break
                 if near:
                     human.raise_hands()
-        for obstacle in self.obstacle_objects:
-            obstacle.move()
+                    self.mark_moved(human.object_id)
+        for object_id in self.motion_manager.update():
+            self.mark_moved(object_id)
 
     def create_ee_starting_points(self) -> list:
+        # use the scenario bank if there is one
+        if self.episode_spec is not None:
+            self.ee_starting_points = self._get_ee_starting_points_from_spec()
+            return self.ee_starting_points
         # use the preset starting points if there are some
         if self.ee_starts:
             ret = []
@@ -220,14 +256,20 @@ class TableExperiment(World):
                 standard_rot += random_rot * 0.1
                 ret.append((self.ee_starts[idx], np.array(pyb.getQuaternionFromEuler(standard_rot.tolist()))))
                 #ret.append((self.ee_start_overwrite[idx], None))
+            self.ee_starting_points = ret
             return ret
         # otherwise, we simply put out nothing, making the robot start in its resting pose
         else:
+            self.ee_starting_points = [(None, None)]
             return [(None, None)]
 
     def create_position_target(self) -> list:
         # in contrast to other worlds, we will not check if for robots that need goals
         # this world only supports one robot with a position goal
+        # use the scenario bank if there is one
+        if self.episode_spec is not None:
+            self.position_targets = self._get_position_targets_from_spec()
+            return self.position_targets
         # use the preset targets if there are some
         if self.experiment == 1:
             self.position_targets = [np.asarray([0.3,  -0.5,  1.2])]
@@ -61,6 +61,7 @@ class TestcasesWorld(World):
         if self.current_test_mode == 2:
             self.moving_plate_position[1] += 1 * 0.15 * 0.005
             pyb.resetBasePositionAndOrientation(self.moving_plate, self.moving_plate_position, [0, 0, 0, 1])
+            self.mark_moved(self.moving_plate)
 
     
     def _build_test_1(self):